@@ -1,28 +1,25 @@
 import asyncio
 import json
-import os
 from pathlib import Path
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from seen_index import job_content, job_key, shared_index
+from jsonl_io import load_json, merge_by_key, write_json
+from metrics import finish_run, metrics
 
 INPUT_PATH = "results/extracted_jobs.json"
 OUTPUT_PATH = "results/extracted_jobs_full.json"
+CONCURRENCY = 4
 
-async def get_description_from_url(url):
+async def get_description_from_url(url, pool):
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            print(f"🌐 Fetching: {url}")
-            await page.goto(url, timeout=60000)
-            await page.wait_for_timeout(3000)
-            text = await page.evaluate("document.body.innerText")
-            await browser.close()
-            return text.strip()
+        print(f"🌐 Fetching: {url}")
+        text = await pool.inner_text(url)
+        return text.strip()
     except Exception as e:
         print(f"❌ Failed to fetch {url}: {e}")
         return ""
 
-async def enrich_jobs_with_descriptions():
+async def enrich_jobs_with_descriptions(concurrency=CONCURRENCY):
     if not Path(INPUT_PATH).exists():
         print(f"❌ Input file not found: {INPUT_PATH}")
         return
@@ -30,20 +27,38 @@ async def enrich_jobs_with_descriptions():
     with open(INPUT_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    jobs = data.get("included", [])
-    for job in jobs:
-        if not job.get("description") and job.get("url"):
-            job["description"] = await get_description_from_url(job["url"])
+    # Skip postings enriched on an earlier run; only new or changed ones go on.
+    index = shared_index()
+    jobs = [
+        job for job in data.get("included", [])
+        if index.is_new("enrich", job_key(job), job_content(job))
+    ]
+    pending = [job for job in jobs if not job.get("description") and job.get("url")]
+    seen_content = {id(job): job_content(job) for job in jobs}
+
+    # The pool size bounds how many pages load at once.
+    async with BrowserPool(size=concurrency) as pool:
+        descriptions = await asyncio.gather(
+            *(get_description_from_url(job["url"], pool) for job in pending)
+        )
+    for job, description in zip(pending, descriptions):
+        job["description"] = description
+        metrics.inc("items_total", stage="enrich", result="out" if description else "failed")
 
+    # Merged into the last run's output so jobs the cleaner has not read yet
+    # are kept; they are marked enriched only once that file is written.
+    previous = load_json(OUTPUT_PATH, {})
     enriched = {
-        "included": jobs,
-        "discarded": data.get("discarded", [])
+        "included": merge_by_key(previous.get("included", []), jobs, job_key),
+        "discarded": merge_by_key(previous.get("discarded", []), data.get("discarded", []), job_key)
     }
-
-    os.makedirs("results", exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(enriched, f, indent=2)
+    write_json(OUTPUT_PATH, enriched)
     print(f"\n💾 Saved enriched jobs to: {OUTPUT_PATH}")
 
+    for job in jobs:
+        if job.get("description"):
+            index.mark("enrich", job_key(job), seen_content[id(job)], url=job.get("url"))
+    finish_run("enrich")
+
 if __name__ == "__main__":
     asyncio.run(enrich_jobs_with_descriptions())
@@ -1,40 +1,217 @@
 import os
 import json
-from openai import OpenAI
+import time
+import asyncio
+import argparse
+import datetime
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from jsonl_io import append_jsonl, iter_jobs
+from llm_cache import cache_key, shared_cache
+from llm_engine import BASE_URL, LLMEngine, estimate_tokens, run_bounded
+from match_ranker import rank_jobs
+from metrics import finish_run, metrics
+from resume_profile import load_profile, profile_block
 
 load_dotenv()
 
 client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
+    base_url=BASE_URL,
     api_key=os.getenv("OPENAI_API_KEY"),
 )
 
-def ask_agent(resume_text, job_text, model="deepseek-coder:3"):
-    prompt = f"""
+async_client = AsyncOpenAI(
+    base_url=BASE_URL,
+    api_key=os.getenv("OPENAI_API_KEY"),
+)
+
+MODEL = "deepseek-coder:3"
+CONCURRENCY = 4
+OUTPUT_DIR = "results"
+COVER_LETTER_TOKENS_ESTIMATE = 500
+
+INSTRUCTIONS = """
 You are a career assistant AI.
 
-Using the resume and job description below, write a short, tailored cover letter that highlights the candidate's strengths and enthusiasm.
-Avoid generic fluff. Focus on how the resume aligns with the job.
+Using the candidate profile below and the job description you are given, write a short, tailored cover letter that highlights the candidate's strengths and enthusiasm.
+Avoid generic fluff. Focus on how the candidate's background aligns with the job.
 
 Return only the cover letter as plain text. No JSON formatting.
+"""
 
-### RESUME:
-{resume_text}
+def build_messages(profile, job_text):
+    # The system message depends only on the profile, so it is the same
+    # prefix for every job and can be served from the provider's prompt cache.
+    return [
+        {"role": "system", "content": f"{INSTRUCTIONS}\n### CANDIDATE PROFILE:\n{profile_block(profile)}"},
+        {"role": "user", "content": f"### JOB DESCRIPTION:\n{job_text}"}
+    ]
 
-### JOB DESCRIPTION:
-{job_text}
-"""
+def ask_agent(resume_text, job_text, model=MODEL, profile=None):
+    if profile is None:
+        profile = load_profile(resume_text)
+    messages = build_messages(profile, job_text)
+
+    cache = shared_cache()
+    key = cache_key(model, messages[0]["content"], messages[1]["content"])
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.inc("cover_letters_total", result="cached")
+        return {"cover_letter": cached}
 
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return {"cover_letter": response.choices[0].message.content.strip()}
+        with metrics.timer("cover_letter_seconds", model=model):
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+        usage = getattr(response, "usage", None)
+        metrics.inc("llm_prompt_tokens_total", getattr(usage, "prompt_tokens", None) or 0, model=model)
+        metrics.inc("llm_completion_tokens_total", getattr(usage, "completion_tokens", None) or 0, model=model)
+        metrics.inc("cover_letters_total", result="written")
+        cover_letter = response.choices[0].message.content.strip()
+        cache.put(key, cover_letter)
+        return {"cover_letter": cover_letter}
     except Exception as e:
+        metrics.inc("cover_letters_total", result="failed")
         print("API Status Code:", getattr(e, 'status_code', 'N/A'))
         print("❌ Agent failed:", str(e))
         return None
+
+_letter_engines = {}
+
+def letter_engine(model):
+    # Streamed letters go through the engine for the shared limiter, the
+    # pause on 429 / Retry-After and the retries.
+    if model not in _letter_engines:
+        _letter_engines[model] = LLMEngine(async_client, model, INSTRUCTIONS)
+    return _letter_engines[model]
+
+def job_to_text(job):
+    if isinstance(job, str):
+        return job
+    header = f"{job.get('title', '')} at {job.get('company', '')} ({job.get('location', '')})"
+    return f"{header}\n{job.get('description', '')}"
+
+async def stream_cover_letter(profile, job, model=MODEL):
+    """Generate one letter over a streamed response and time it."""
+    messages = build_messages(profile, job_to_text(job))
+    cache = shared_cache()
+    key = cache_key(model, messages[0]["content"], messages[1]["content"])
+    started = time.perf_counter()
+
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.inc("cover_letters_total", result="cached")
+        return {"job": job, "cover_letter": cached, "cached": True,
+                "latency_s": round(time.perf_counter() - started, 3)}
+
+    estimated = estimate_tokens(messages[0]["content"], messages[1]["content"]) + COVER_LETTER_TOKENS_ESTIMATE
+    timing = {}
+
+    async def request():
+        timing["requested"] = time.perf_counter()
+        timing["first_token"] = None
+        stream = await async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        parts, usage, finish_reason = [], None, None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                timing["first_token"] = timing["first_token"] or time.perf_counter()
+                parts.append(chunk.choices[0].delta.content)
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+        cover_letter = "".join(parts).strip()
+        if not cover_letter:
+            # Retried like any other failed request.
+            raise ValueError("empty cover letter")
+        return (cover_letter, finish_reason, usage), usage
+
+    result = await letter_engine(model).call(request, estimated)
+    if result is None:
+        metrics.inc("cover_letters_total", result="failed")
+        return None
+    cover_letter, finish_reason, usage = result
+    # A letter cut off at the token limit is returned but never cached.
+    if finish_reason != "length":
+        cache.put(key, cover_letter)
+    finished = time.perf_counter()
+    requested, first_token = timing["requested"], timing["first_token"] or finished
+    metrics.observe("cover_letter_seconds", finished - requested, model=model)
+    metrics.observe("cover_letter_first_token_seconds", first_token - requested, model=model)
+    metrics.inc("cover_letters_total", result="written" if finish_reason != "length" else "truncated")
+    return {
+        "job": job,
+        "cover_letter": cover_letter,
+        "cached": False,
+        "truncated": finish_reason == "length",
+        "latency_s": round(finished - started, 3),
+        "first_token_s": round(first_token - started, 3),
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+    }
+
+async def generate_cover_letters(resume_text, jobs, model=MODEL, concurrency=CONCURRENCY, out_path=None,
+                                 top_k=None, min_score=None):
+    """Write a cover letter per job to a JSONL file as each one finishes.
+
+    With top_k or min_score set, jobs are ranked against the resume first and
+    only the best matches reach the LLM.
+    """
+    if top_k is not None or min_score is not None:
+        ranked = rank_jobs(resume_text, jobs, top_k=top_k, threshold=min_score)
+        print(f"🎯 {len(ranked)} jobs selected by match score"
+              + (f" (best {ranked[0][1]:.2f}, worst {ranked[-1][1]:.2f})" if ranked else ""))
+        jobs = [job for job, _ in ranked]
+    profile = load_profile(resume_text)
+    if out_path is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = os.path.join(OUTPUT_DIR, f"cover_letters_{timestamp}.jsonl")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+    summary = {"written": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    started = time.perf_counter()
+
+    async def handle(job):
+        result = await stream_cover_letter(profile, job, model)
+        if result is None:
+            print("❌ Agent failed:", job.get("title", "job") if isinstance(job, dict) else "job")
+            summary["failed"] += 1
+            return
+        append_jsonl(out_path, result)
+        summary["written"] += 1
+        summary["prompt_tokens"] += result.get("prompt_tokens") or 0
+        summary["completion_tokens"] += result.get("completion_tokens") or 0
+        title = job.get("title", "job") if isinstance(job, dict) else "job"
+        print(f"✉️  {title}: {result['latency_s']}s, "
+              f"{result.get('prompt_tokens') or '-'} in / {result.get('completion_tokens') or '-'} out"
+              f"{' (cached)' if result['cached'] else ''}")
+
+    await run_bounded(jobs, handle, concurrency)
+    summary["elapsed_s"] = round(time.perf_counter() - started, 2)
+    print(f"\n💾 {summary['written']} cover letters → {out_path} in {summary['elapsed_s']}s "
+          f"({summary['failed']} failed, {summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens)")
+    return summary
+
+if __name__ == "__main__":
+    from resume_loader import load_resume_text
+
+    parser = argparse.ArgumentParser(description="Generate cover letters for a list of jobs")
+    parser.add_argument("jobs", help="JSON or JSONL file of jobs")
+    parser.add_argument("resume", help="resume PDF")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--top-k", type=int, help="only write letters for the K best-matching jobs")
+    parser.add_argument("--min-score", type=float, help="skip jobs whose match score is below this")
+    args = parser.parse_args()
+
+    asyncio.run(generate_cover_letters(
+        load_resume_text(args.resume), iter_jobs(args.jobs), concurrency=args.concurrency,
+        top_k=args.top_k, min_score=args.min_score
+    ))
+    finish_run("cover_letters")
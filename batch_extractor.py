@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+from llm_engine import estimate_tokens
+
+# === BATCH SETTINGS ===
+BATCH_TOKEN_BUDGET = 6000
+MAX_BATCH_ITEMS = 8
+
+BATCH_INSTRUCTIONS = """
+You will receive several listings, each introduced by a line "### LISTING <id>".
+Return a JSON array with exactly one object per listing. Each object follows the
+schema above and adds an "id" field holding the listing id as a number.
+Return only the JSON array with no extra text.
+"""
+
+
+def iter_batches(items, token_budget=BATCH_TOKEN_BUDGET, max_items=MAX_BATCH_ITEMS, text=lambda item: item):
+    """Group items lazily into batches that fit the prompt token budget."""
+    batch, used = [], 0
+    for item in items:
+        cost = estimate_tokens(text(item))
+        if batch and (used + cost > token_budget or len(batch) >= max_items):
+            yield batch
+            batch, used = [], 0
+        batch.append(item)
+        used += cost
+    if batch:
+        yield batch
+
+
+def build_batch_prompt(texts):
+    parts = ["Extract job information from each listing below."]
+    for listing_id, text in enumerate(texts, 1):
+        parts.append(f"### LISTING {listing_id}\n{text}")
+    return "\n\n".join(parts)
+
+
+def is_valid(record):
+    if not isinstance(record, dict):
+        return False
+    title = record.get("title")
+    return isinstance(title, str) and title.strip() not in ("", "Not Available")
+
+
+async def extract_batch(batch_engine, extract_one, texts):
+    """Extract several listings with one request.
+
+    Returns results aligned with `texts`. Listings the batch answer misses
+    or gets wrong are retried one by one through `extract_one`.
+    """
+    results = [None] * len(texts)
+    if len(texts) > 1:
+        response = await batch_engine.complete_json(build_batch_prompt(texts))
+        if isinstance(response, dict):
+            # Some models wrap the array, e.g. {"jobs": [...]}.
+            response = next((v for v in response.values() if isinstance(v, list)), [response])
+        for record in response or []:
+            try:
+                index = int(record.pop("id")) - 1
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < len(texts) and results[index] is None and is_valid(record):
+                results[index] = record
+
+    missing = [i for i, record in enumerate(results) if record is None]
+    if missing and len(texts) > 1:
+        logging.info(f"🔁 Retrying {len(missing)}/{len(texts)} listings individually")
+    retried = await asyncio.gather(*(extract_one(texts[i]) for i in missing))
+    for i, record in zip(missing, retried):
+        results[i] = record
+    return results
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import fake_llm_server
+
+# === BENCHMARK SETTINGS ===
+# Recorded inputs replayed by every run; nothing here touches the network.
+CRAWL_FILE = "job_listings_20250415_171223.json"
+JOBS_FILE = "results/cleaned_jobs.json"
+RESUME_FILE = "Resume_can_final_2.pdf"
+OUTPUT_DIR = "results/benchmarks"
+TARGETS = ["visual", "indeed", "cleaner", "agent", "contacts"]
+PORT = 3020
+CONCURRENCY = 4
+# High enough that the client-side limiter never becomes the bottleneck
+# unless a run asks for it.
+CLIENT_RPM = 100000
+RESULT_MARKER = "BENCH_RESULT "
+# Thresholds above 1.0 send every item down the LLM path: the rule
+# extractor and boilerplate heuristic otherwise answer most recorded items
+# locally and the stub never sees them.
+FORCE_LLM_ENV = {"RULE_CONFIDENCE_THRESHOLD": "1.01", "CLEAN_CONFIDENCE_THRESHOLD": "1.01"}
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def quantile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# === SYNTHETIC CORPORA ===
+def scaled_pages(path, scale):
+    """Crawl pages repeated `scale` times; each copy gets its own links so
+    chunk hashes differ and nothing is deduplicated away."""
+    from crawl_reader import iter_crawl_pages
+
+    for copy in range(scale):
+        for website, status, metadata, markdown in iter_crawl_pages(path):
+            if copy and markdown:
+                markdown = markdown.replace("](https://", f"](https://r{copy}.")
+            yield website, status, metadata, markdown
+
+
+def scaled_jobs(path, scale):
+    """Recorded jobs repeated `scale` times under distinct URLs."""
+    from jsonl_io import iter_jobs
+
+    jobs = list(iter_jobs(path))
+    for copy in range(scale):
+        for job in jobs:
+            if copy:
+                # Only the URL changes: an edited description could flip the
+                # cleaner between its heuristic and LLM paths.
+                job = {**job, "url": f"{job.get('url', '')}#r{copy}"}
+            yield job
+
+
+def take(items, limit):
+    for count, item in enumerate(items):
+        if limit and count >= limit:
+            return
+        yield item
+
+
+# === TARGETS (run inside the child process) ===
+def visual_work(args):
+    import visual_job_extractor as extractor
+    from jsonl_io import Checkpoint
+
+    chunks = extractor.iter_chunks(scaled_pages(args.crawl, args.scale), Checkpoint("visual.checkpoint"))
+
+    async def run(item):
+        key, chunk, metadata = item
+        return await extractor.process_chunk(chunk, key[0], metadata)
+    return chunks, run
+
+
+def indeed_work(args):
+    import indeed_extractor as extractor
+    from jsonl_io import Checkpoint
+
+    chunks = extractor.iter_chunks(scaled_pages(args.crawl, args.scale), Checkpoint("indeed.checkpoint"))
+
+    async def run(item):
+        key, chunk, metadata = item
+        return await extractor.process_chunk(chunk, key[0], metadata)
+    return chunks, run
+
+
+def cleaner_work(args):
+    from description_cleaner import clean_description_async
+
+    jobs = (job for job in scaled_jobs(args.jobs, args.scale) if job.get("description"))
+
+    async def run(job):
+        cleaned, status = await clean_description_async(job["description"])
+        return cleaned if status != "failed" else None
+    return jobs, run
+
+
+def agent_work(args):
+    from agent_brain import stream_cover_letter
+    from resume_loader import load_resume_text
+    from resume_profile import load_profile
+
+    # Built once up front, as generate_cover_letters does; not part of the timing.
+    profile = load_profile(load_resume_text(args.resume))
+
+    async def run(job):
+        return await stream_cover_letter(profile, job)
+    return scaled_jobs(args.jobs, args.scale), run
+
+
+def contacts_work(args):
+    from contact_finder import fetch_contacts
+    from http_client import HttpClient
+    from jsonl_io import iter_jobs
+
+    companies = sorted({job.get("company") or "Example Corp" for job in iter_jobs(args.jobs)})
+    queries = [f'"CEO" "Toronto" "{company}" {copy or ""}'.strip()
+               for copy in range(args.scale) for company in companies]
+    client = None
+
+    async def run(query):
+        nonlocal client
+        if client is None:
+            client = HttpClient(per_host=args.concurrency)
+        data = await fetch_contacts(client, query)
+        return data if data and "error" not in data else None
+    return queries, run
+
+
+WORK = {"visual": visual_work, "indeed": indeed_work, "cleaner": cleaner_work,
+        "agent": agent_work, "contacts": contacts_work}
+
+
+def run_child(args):
+    """Time every item of one target and print a single result line."""
+    from llm_engine import run_bounded
+
+    items, handler = WORK[args.child](args)
+    latencies, counts = [], {"ok": 0, "failed": 0}
+    rss_before = peak_rss_mb()
+
+    async def timed(item):
+        started = time.perf_counter()
+        try:
+            result = await handler(item)
+        except Exception:
+            result = None
+        latencies.append(time.perf_counter() - started)
+        counts["ok" if result else "failed"] += 1
+
+    started = time.perf_counter()
+    asyncio.run(run_bounded(take(items, args.limit), timed, args.concurrency))
+    elapsed = time.perf_counter() - started
+    print(RESULT_MARKER + json.dumps({
+        "target": args.child,
+        "items": len(latencies),
+        **counts,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_s": round(quantile(latencies, 0.5), 4),
+        "p99_s": round(quantile(latencies, 0.99), 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_at_start_mb": rss_before,
+    }))
+
+
+# === PARENT ===
+def server_stats(base):
+    with urllib.request.urlopen(f"{base}/stats", timeout=5) as response:
+        return json.load(response)
+
+
+def bench_target(target, args, base):
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])),
+        "LLM_BASE_URL": f"{base}/v1",
+        "SERPAPI_URL": f"{base}/search.json",
+        "OPENAI_API_KEY": "bench",
+        "LLM_CACHE": "off",
+        "SEEN_INDEX": "off",
+        "NEAR_DUP_INDEX": "off",
+        "LLM_MAX_IN_FLIGHT": str(args.concurrency),
+        "LLM_REQUESTS_PER_MIN": str(args.client_rpm),
+        **({} if args.fast_paths else FORCE_LLM_ENV),
+    }
+    command = [sys.executable, os.path.join(REPO_DIR, "benchmark.py"), "--child", target,
+               "--scale", str(args.scale), "--limit", str(args.limit), "--concurrency", str(args.concurrency),
+               "--crawl", os.path.abspath(args.crawl), "--jobs", os.path.abspath(args.jobs),
+               "--resume", os.path.abspath(args.resume)]
+    before = server_stats(base)
+    # Each target gets a fresh process (clean peak RSS, module-level clients
+    # built against the stub) and a scratch directory for whatever it writes.
+    with tempfile.TemporaryDirectory(prefix=f"bench_{target}_") as workdir:
+        proc = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    after = server_stats(base)
+
+    line = next((l for l in reversed(proc.stdout.splitlines()) if l.startswith(RESULT_MARKER)), None)
+    if line is None:
+        print(f"❌ {target} failed (exit {proc.returncode}):\n{(proc.stderr or proc.stdout)[-2000:]}")
+        return None
+    result = json.loads(line[len(RESULT_MARKER):])
+    result["server"] = {key: after[key] - before[key] for key in ("requests", "errors", "throttled")}
+    result["server"]["peak_in_flight"] = after["peak_in_flight"]
+    return result
+
+
+def print_table(results):
+    print(f"\n{'target':<10}{'items':>7}{'failed':>8}{'jobs/s':>9}{'p50 s':>9}{'p99 s':>9}"
+          f"{'peak MB':>9}{'reqs':>7}{'500s':>6}{'429s':>6}")
+    for r in results:
+        s = r["server"]
+        print(f"{r['target']:<10}{r['items']:>7}{r['failed']:>8}{r['jobs_per_s']:>9.2f}{r['p50_s']:>9.3f}"
+              f"{r['p99_s']:>9.3f}{r['peak_rss_mb']:>9.1f}{s['requests']:>7}{s['errors']:>6}{s['throttled']:>6}")
+
+
+def main(args):
+    if args.llm_url:
+        base = args.llm_url.rstrip("/")
+    else:
+        server, _ = fake_llm_server.start(args.port, latency=args.latency, jitter=args.jitter,
+                                          error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                          rpm=args.rpm, retry_after=args.retry_after)
+        base = f"http://127.0.0.1:{args.port}"
+        print(f"🧪 Fake LLM on {base} (latency {args.latency}s ±{args.jitter:.0%}, "
+              f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled, rpm {args.rpm or '∞'})")
+
+    results, idle = [], []
+    for target in args.targets:
+        print(f"⏱️  {target}: scale {args.scale}, concurrency {args.concurrency}...")
+        result = bench_target(target, args, base)
+        if result:
+            print(f"✅ {target}: {result['items']} items in {result['elapsed_s']:.1f}s "
+                  f"({result['jobs_per_s']:.2f}/s, p99 {result['p99_s']:.2f}s)")
+            if result["items"] and not result["server"]["requests"]:
+                # Timings without a single request say nothing about the LLM path.
+                print(f"⚠️  {target}: the stub received 0 requests for {result['items']} items")
+                idle.append(target)
+            results.append(result)
+    if not args.llm_url:
+        server.shutdown()
+
+    print_table(results)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, f"bench_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"settings": {k: v for k, v in vars(args).items() if k != "child"}, "results": results,
+                   "no_requests": idle}, f, indent=2)
+    print(f"\n💾 Benchmark report → {path}")
+    if idle and not args.fast_paths:
+        print(f"❌ No LLM requests from: {', '.join(idle)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded inputs against a local LLM stub and time each stage")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--scale", type=int, default=1, help="repeat each corpus N times as unique synthetic copies")
+    parser.add_argument("--limit", type=int, default=0, help="stop each target after this many items (0 = all)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.5, help="stub latency varies by ± this share")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of stub requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="stub requests per minute before 429 (0 = no limit)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds the stub sends")
+    parser.add_argument("--client-rpm", type=int, default=CLIENT_RPM, help="LLM_REQUESTS_PER_MIN for the clients")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--llm-url", help="use an already running stub instead of starting one")
+    parser.add_argument("--crawl", default=CRAWL_FILE, help="recorded Firecrawl dump")
+    parser.add_argument("--jobs", default=JOBS_FILE, help="recorded jobs with descriptions")
+    parser.add_argument("--resume", default=RESUME_FILE, help="resume PDF for the cover-letter target")
+    parser.add_argument("--fast-paths", action="store_true",
+                        help="keep the rule extractor and heuristic cleaner instead of forcing every item to the LLM")
+    parser.add_argument("--child", choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        main(args)
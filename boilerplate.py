@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import time
+from html import unescape
+from html.parser import HTMLParser
+
+# === HEURISTIC SETTINGS ===
+# Above 1.0 the heuristic result is never trusted and every description
+# goes to the LLM (benchmark.py does this to time the LLM path).
+CONFIDENCE_THRESHOLD = float(os.getenv("CLEAN_CONFIDENCE_THRESHOLD", "0.6"))
+MIN_CONTENT_CHARS = 300
+
+BOILERPLATE_RE = re.compile(
+    r"cookie|privacy|terms of (use|service)|sign in|log in|sign up|subscribe|newsletter|"
+    r"all rights reserved|©|follow us|share this|back to (top|jobs)|skip to|"
+    r"similar jobs|related jobs|other jobs|view all|load more|menu",
+    re.IGNORECASE,
+)
+JOB_HEADER_RE = re.compile(
+    r"responsibilit|requirement|qualification|about (the|this) (role|job|position)|"
+    r"what you('ll| will)|who you are|experience|skills|benefits|we offer|nice to have",
+    re.IGNORECASE,
+)
+BULLET_RE = re.compile(r"^\s*([-•*·▪]|\d+[.)])\s+")
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+              "section", "article", "tr", "header", "footer", "nav"}
+
+
+class _TextExtractor(HTMLParser):
+    """HTML to text that keeps one line per block element."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n- " if tag == "li" else "\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self.skip = max(0, self.skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return unescape("".join(parser.parts))
+
+
+def _score(line):
+    words = len(line.split())
+    if BOILERPLATE_RE.search(line) and words < 12:
+        return -3.0
+    if JOB_HEADER_RE.search(line) and words <= 8:
+        return 2.0
+    if BULLET_RE.match(line) and words >= 3:
+        return 1.5
+    if words >= 8:
+        # Prose: longer sentences carry more weight.
+        return min(words / 8.0, 4.0) + (0.5 if line.rstrip().endswith((".", ":", "!", "?")) else 0)
+    return -1.0 if words <= 3 else -0.25
+
+
+def strip_boilerplate(raw_text):
+    """Keep the densest contiguous run of content lines.
+
+    Returns (text, confidence). Confidence is the share of all positive
+    line weight that landed in the kept block, zeroed when lines were cut
+    and what is left is too short to be a real description.
+    """
+    text = raw_text or ""
+    if re.search(r"<(p|div|li|br|ul|h\d)\b", text, re.IGNORECASE):
+        text = html_to_text(text)
+    lines = [re.sub(r"[ \t ]+", " ", line).strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if not lines:
+        return "", 0.0
+
+    scores = [_score(line) for line in lines]
+
+    # Maximum-sum contiguous block (Kadane).
+    best_sum, best_start, best_end = float("-inf"), 0, 0
+    running, start = 0.0, 0
+    for i, score in enumerate(scores):
+        if running <= 0:
+            running, start = score, i
+        else:
+            running += score
+        if running > best_sum:
+            best_sum, best_start, best_end = running, start, i + 1
+
+    block = "\n".join(lines[best_start:best_end])
+    positive = sum(s for s in scores if s > 0)
+    kept = sum(s for s in scores[best_start:best_end] if s > 0)
+    confidence = kept / positive if positive else 0.0
+    if best_end - best_start == len(lines):
+        # Nothing was cut: the input is already just the description.
+        confidence = 1.0
+    elif len(block) < MIN_CONTENT_CHARS:
+        confidence = 0.0
+    return block, round(confidence, 3)
+
+
+if __name__ == "__main__":
+    # Throughput benchmark on the recorded feed output.
+    with open("results/cleaned_jobs.json", "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    docs = [job.get("description") or "" for job in jobs]
+    rounds = 20
+    size = sum(len(d) for d in docs) * rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        results = [strip_boilerplate(d) for d in docs]
+    elapsed = time.perf_counter() - started
+
+    confident = sum(1 for _, c in results if c >= CONFIDENCE_THRESHOLD)
+    kept = sum(len(t) for t, _ in results) / max(1, sum(len(d) for d in docs))
+    print(f"{len(docs) * rounds} docs in {elapsed:.2f}s "
+          f"({len(docs) * rounds / elapsed:.0f} docs/s, {size / elapsed / 1e6:.1f} MB/s)")
+    print(f"{confident}/{len(docs)} confident enough to skip the LLM; kept {kept:.0%} of input characters")
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from playwright.async_api import async_playwright
+from metrics import metrics
+
+# === POOL SETTINGS ===
+POOL_SIZE = 4
+NAVIGATION_TIMEOUT = 60000
+READY_TIMEOUT = 10000
+BLOCKED_RESOURCES = {"image", "media", "font"}
+# Page counts as ready once the body holds real text, not just a loading shell.
+READY_SCRIPT = "() => document.body && document.body.innerText.trim().length > 200"
+
+
+class BrowserPool:
+    """One long-lived Chromium with a bounded set of reusable pages."""
+
+    def __init__(self, size=POOL_SIZE, headless=True):
+        self.size = size
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._pages = asyncio.Queue()
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.size):
+            self._pages.put_nowait(await self._new_page())
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._browser.close()
+        await self._playwright.stop()
+
+    async def _new_page(self):
+        context = await self._browser.new_context()
+        await context.route("**/*", self._route)
+        return await context.new_page()
+
+    async def _route(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @asynccontextmanager
+    async def page(self):
+        page = await self._pages.get()
+        try:
+            yield page
+        except Exception:
+            # A page that errored may be stuck mid-navigation; swap in a fresh one.
+            await page.context.close()
+            page = await self._new_page()
+            raise
+        finally:
+            self._pages.put_nowait(page)
+
+    async def inner_text(self, url, ready_selector=None):
+        host = urlsplit(url).netloc
+        queued = time.perf_counter()
+        async with self.page() as page:
+            started = time.perf_counter()
+            metrics.observe("page_slot_wait_seconds", started - queued)
+            try:
+                await page.goto(url, timeout=NAVIGATION_TIMEOUT, wait_until="domcontentloaded")
+            except Exception:
+                metrics.inc("page_load_failures_total", host=host)
+                raise
+            try:
+                if ready_selector:
+                    await page.wait_for_selector(ready_selector, timeout=READY_TIMEOUT)
+                else:
+                    await page.wait_for_function(READY_SCRIPT, timeout=READY_TIMEOUT)
+            except Exception:
+                metrics.inc("page_ready_timeouts_total", host=host)
+                logging.info(f"Readiness check timed out for {url}, using current content")
+            text = await page.evaluate("document.body.innerText")
+            metrics.observe("page_load_seconds", time.perf_counter() - started, host=host)
+            metrics.inc("page_text_bytes_total", len(text.encode("utf-8")), host=host)
+            return text
@@ -1,48 +1,103 @@
 import os
 import json
-import requests
+import asyncio
+import time
+import httpx
 from pathlib import Path
 from hashlib import sha256
+from http_client import HttpClient
+from tiered_cache import TieredCache
 
 # Your SerpAPI key (safe to keep it here for testing, but store in env for prod)
 SERPAPI_KEY = "85b049f0260260a65c0f42bc22dd331bfa1664d5b33b5affabc314503f0a50fa"
+# SERPAPI_URL=http://127.0.0.1:3020/search.json replays cache/*.json from fake_llm_server.py
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
 
-# Directory for caching queries
+# === CACHE SETTINGS ===
 CACHE_DIR = "cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+CACHE_PATH = os.path.join(CACHE_DIR, "contacts.sqlite")
+CACHE_TTL = int(os.getenv("CONTACT_CACHE_TTL", str(14 * 24 * 3600)))
+CACHE_MAX_BYTES = int(os.getenv("CONTACT_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+CONCURRENCY = 8
+
+cache = TieredCache(CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
 
 def generate_cache_key(query: str):
     return sha256(query.encode()).hexdigest()
 
-def search_contacts(query: str):
-    # Generate a cache filename from the query hash
-    cache_file = Path(CACHE_DIR) / f"{generate_cache_key(query)}.json"
-    
-    # Return from cache if exists
-    if cache_file.exists():
-        print(f"✅ Loaded from cache: {cache_file.name}")
-        with open(cache_file, "r") as f:
-            return json.load(f)
-
-    # SerpAPI request
-    print("🔍 Fetching from SerpAPI...")
-    url = "https://serpapi.com/search.json"
+def cached_contacts(query: str):
+    """Cached SerpAPI response for a query, or None."""
+    key = generate_cache_key(query)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    # Responses cached by earlier versions as cache/<sha>.json are copied into
+    # the store. Their age counts from the file's mtime, so once an entry
+    # expires the file is too old to be imported again. (The files stay:
+    # fake_llm_server.py replays them.)
+    legacy_file = Path(CACHE_DIR) / f"{key}.json"
+    if not legacy_file.exists():
+        return None
+    ttl = CACHE_TTL - (time.time() - legacy_file.stat().st_mtime)
+    if ttl <= 0:
+        return None
+    with open(legacy_file, "r") as f:
+        data = json.load(f)
+    cache.put(key, data, ttl=ttl)
+    return data
+
+async def fetch_contacts(client, query: str):
+    print(f"🔍 Fetching from SerpAPI: {query}")
     params = {
         "q": query,
         "engine": "google",
         "api_key": SERPAPI_KEY,
         "num": 10,
     }
-    response = requests.get(url, params=params)
-    data = response.json()
-
-    # Save to cache
-    with open(cache_file, "w") as f:
-        json.dump(data, f, indent=2)
-    print(f"💾 Saved to cache: {cache_file.name}")
-    
+    try:
+        result = await client.get(SERPAPI_URL, params=params)
+        data = result.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"❌ SerpAPI request failed for {query}: {e}")
+        return None
+
+    # Error payloads are returned but never cached.
+    if result.ok and "error" not in data:
+        cache.put(generate_cache_key(query), data)
     return data
 
+async def fetch_contacts_many(queries, concurrency=CONCURRENCY):
+    # One pooled client; its per-host limit bounds concurrent SerpAPI calls.
+    async with HttpClient(per_host=concurrency) as client:
+        results = await asyncio.gather(*(fetch_contacts(client, query) for query in queries))
+    return dict(zip(queries, results))
+
+def search_contacts(query: str):
+    data = cached_contacts(query)
+    if data is not None:
+        print(f"✅ Loaded from cache: {query}")
+        return data
+    return asyncio.run(fetch_contacts_many([query]))[query]
+
+def search_contacts_many(queries, concurrency=CONCURRENCY):
+    """Resolve many queries: cache hits at once, misses concurrently.
+
+    Returns {query: data}; a query whose request failed maps to None.
+    """
+    results, misses = {}, []
+    for query in dict.fromkeys(queries):
+        data = cached_contacts(query)
+        if data is None:
+            misses.append(query)
+        else:
+            results[query] = data
+    print(f"📇 {len(results)} cached, {len(misses)} to fetch")
+
+    if misses:
+        results.update(asyncio.run(fetch_contacts_many(misses, concurrency)))
+    return results
+
 def extract_contacts(data):
     results = []
     for result in data.get("organic_results", [])[:5]:
@@ -66,3 +121,5 @@ if __name__ == "__main__":
         print(f"- {c['name']}")
         print(f"  ↳ {c['linkedin']}")
         print(f"  📝 {c['summary']}\n")
+
+    print("📊 Cache:", cache.stats())
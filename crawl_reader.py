@@ -0,0 +1,122 @@
+import json
+from collections import namedtuple
+
+from jsonl_io import iter_jsonl
+
+CrawlPage = namedtuple("CrawlPage", ["website", "status", "metadata", "markdown"])
+
+READ_SIZE = 1 << 16
+
+
+class _JsonStream:
+    """Pull parser over a file: reads just enough text to decode the next value."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer only ever holds the current value.
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} in crawl dump")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may still be cut off.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def separator(self, closing):
+        """Consume ',' or the closing bracket; return True while items remain."""
+        char = self.peek()
+        self.pos += 1
+        if char == ",":
+            return True
+        if char == closing:
+            return False
+        raise ValueError(f"Unexpected {char!r} in crawl dump")
+
+
+def _iter_json_dump(path):
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            website = stream.value()
+            stream.expect(":")
+            stream.expect("{")
+            status = None
+            more_keys = stream.peek() != "}"
+            if not more_keys:
+                stream.pos += 1
+            while more_keys:
+                key = stream.value()
+                stream.expect(":")
+                if key == "data" and stream.peek() == "[":
+                    stream.pos += 1
+                    more_pages = stream.peek() != "]"
+                    if not more_pages:
+                        stream.pos += 1
+                    while more_pages:
+                        page = stream.value()
+                        yield CrawlPage(website, status, page.get("metadata", {}), page.get("markdown", ""))
+                        more_pages = stream.separator("]")
+                else:
+                    value = stream.value()
+                    if key == "status":
+                        status = value
+                more_keys = stream.separator("}")
+            if not stream.separator("}"):
+                return
+
+
+def _iter_jsonl_dump(path):
+    for record in iter_jsonl(path):
+        page = record.get("page", {})
+        yield CrawlPage(record.get("website"), record.get("status"),
+                        page.get("metadata", {}), page.get("markdown", ""))
+
+
+def iter_crawl_pages(path):
+    """Yield CrawlPage records one at a time from a Firecrawl dump.
+
+    Accepts the JSONL format written by crawlai (one page per line) and the
+    older {url: {"status", "data": [...]}} JSON files, which are parsed
+    incrementally so only one page is held in memory at a time. crawlai
+    writes "status" before "data", so each page carries its site status.
+    """
+    if path.endswith(".jsonl"):
+        return _iter_jsonl_dump(path)
+    return _iter_json_dump(path)
@@ -1,10 +1,28 @@
+import os
 import time
-import json
+import asyncio
 import datetime
-from firecrawl import FirecrawlApp
+import httpx
+from urllib.parse import urlsplit
+from http_client import HttpClient
+from jsonl_io import append_jsonl
+from metrics import finish_run, metrics
+from rate_limiter import RateLimiter
 
-# Initialize the Firecrawl app with your API key
-app = FirecrawlApp(api_key="fc-9de23a8c60b14fd5874ece1c1028d909")
+# === FIRECRAWL SETTINGS ===
+# FIRECRAWL_API_URL=http://127.0.0.1:3002 points this at fake_firecrawl.py
+API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev").rstrip("/")
+API_KEY = os.getenv("FIRECRAWL_API_KEY", "fc-9de23a8c60b14fd5874ece1c1028d909")
+CRAWLS_PER_MIN = int(os.getenv("FIRECRAWL_CRAWLS_PER_MIN", "1"))
+STATUS_PER_MIN = int(os.getenv("FIRECRAWL_STATUS_PER_MIN", "60"))
+TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Status polling starts fast and backs off while a crawl makes no progress.
+POLL_MIN = 2.0
+POLL_MAX = 30.0
+POLL_BACKOFF = 1.5
+CRAWL_TIMEOUT = 15 * 60
+MAX_RETRIES = 5
 
 # Job search URLs to crawl
 urls = [
@@ -14,92 +32,119 @@ urls = [
     "https://ca.indeed.com/q-data-scientist-l-toronto,-on-jobs.html"
 ]
 
-def crawl_job_site(url):
+CRAWL_PARAMS = {
+    'limit': 3,  # Maximum number of pages to crawl
+    'maxDepth': 2,  # Crawl up to 2 levels deep
+    'scrapeOptions': {
+        'formats': ['markdown', 'links'],  # Get content as markdown and extract links
+        'onlyMainContent': False,  # Get the full page content
+        'waitFor': 5000  # Wait 5 seconds for dynamic content to load
+    }
+}
+
+
+class CrawlScheduler:
+    """Submits Firecrawl crawls and polls them concurrently.
+
+    Crawl submissions and status checks each go through a shared
+    RateLimiter sized to the plan's limits; a 429 pauses every caller for
+    the provider's Retry-After instead of sleeping a fixed amount.
+    """
+
+    def __init__(self, client, crawls_per_min=CRAWLS_PER_MIN, status_per_min=STATUS_PER_MIN):
+        self.client = client
+        self.submit_limiter = RateLimiter(requests_per_minute=crawls_per_min, request_burst=1)
+        self.status_limiter = RateLimiter(requests_per_minute=status_per_min)
+
+    async def _request(self, limiter, method, url, **kwargs):
+        response = await self.client.request(method, url, limiter=limiter, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def submit(self, url, params=CRAWL_PARAMS):
+        body = await self._request(self.submit_limiter, "POST", f"{API_URL}/v1/crawl", json={"url": url, **params})
+        if not body.get("success", True) or not body.get("id"):
+            raise RuntimeError(f"Crawl was not accepted: {body}")
+        return body["id"]
+
+    async def wait(self, crawl_id):
+        """Poll until the crawl finishes; returns the first status page."""
+        interval, progress = POLL_MIN, -1
+        deadline = time.monotonic() + CRAWL_TIMEOUT
+        while time.monotonic() < deadline:
+            status = await self._request(self.status_limiter, "GET", f"{API_URL}/v1/crawl/{crawl_id}")
+            if status.get("status") in ("completed", "failed", "cancelled"):
+                return status
+            completed = status.get("completed", 0)
+            interval = POLL_MIN if completed > progress else min(interval * POLL_BACKOFF, POLL_MAX)
+            progress = completed
+            await asyncio.sleep(interval)
+        raise TimeoutError(f"Crawl {crawl_id} did not finish in {CRAWL_TIMEOUT}s")
+
+    async def pages(self, status):
+        """Yield result pages, following `next` links for large crawls."""
+        while True:
+            for page in status.get("data") or []:
+                yield page
+            if not status.get("next"):
+                return
+            status = await self._request(self.status_limiter, "GET", status["next"])
+
+
+async def crawl_job_site(scheduler, url, filename):
     print(f"\n\nStarting crawl for: {url}")
-    
+    started = time.perf_counter()
     try:
-        # Start the crawl with parameters based on the documentation
-        crawl_response = app.crawl_url(
-            url,
-            params={
-                'limit': 3,  # Maximum number of pages to crawl
-                'maxDepth': 2,  # Crawl up to 2 levels deep
-                'scrapeOptions': {
-                    'formats': ['markdown', 'links'],  # Get content as markdown and extract links
-                    'onlyMainContent': False,  # Get the full page content
-                    'waitFor': 5000  # Wait 5 seconds for dynamic content to load
-                }
-            },
-            poll_interval=30  # Check status every 30 seconds
-        )
-        
-        print(f"Crawl response: {json.dumps(crawl_response, indent=2)[:500]}...")
-        
-        # Check if the crawl was successful
-        if crawl_response.get('status') == 'completed':
-            print("Crawl completed successfully")
-            
-            # The data should be directly in the response
-            # Return the entire response for saving
-            return crawl_response
-        else:
-            print(f"Crawl failed or is still in progress. Status: {crawl_response.get('status')}")
-            return None
-            
+        crawl_id = await scheduler.submit(url)
+        print(f"🕷️  Crawl {crawl_id} submitted for {url}")
+        status = await scheduler.wait(crawl_id)
+
+        if status.get('status') != 'completed':
+            metrics.inc("crawl_failures_total", site=urlsplit(url).netloc)
+            print(f"Crawl failed or is still in progress. Status: {status.get('status')}")
+            return 0
+
+        # One JSONL line per page, written as pages arrive, so nothing
+        # accumulates across sites.
+        page_count = 0
+        async for page in scheduler.pages(status):
+            append_jsonl(filename, {
+                'website': url,
+                'status': status.get('status'),
+                'page': page
+            })
+            page_count += 1
+        metrics.observe("crawl_seconds", time.perf_counter() - started, site=urlsplit(url).netloc)
+        metrics.inc("crawl_pages_total", page_count, site=urlsplit(url).netloc)
+        print(f"Retrieved {page_count} pages for {url} in {time.perf_counter() - started:.0f}s")
+        return page_count
+
     except Exception as e:
         print(f"Error crawling {url}: {e}")
-        return None
-
-def main():
-    results = {}
-    
-    for i, url in enumerate(urls):
-        try:
-            if i > 0:
-                # Wait 70 seconds between crawls to respect rate limits
-                print(f"Waiting 70 seconds before starting the next crawl...")
-                time.sleep(70)
-            
-            print(f"Starting crawl for {url}")
-            data = crawl_job_site(url)
-            
-            if data:
-                # Extract just the relevant parts to save space
-                results[url] = {
-                    'status': data.get('status'),
-                    'data': data.get('data', [])
-                }
-                
-                # Print some basic info about what we found
-                page_count = len(data.get('data', []))
-                print(f"Retrieved {page_count} pages for {url}")
-            
-        except Exception as e:
-            print(f"Error in main loop for {url}: {e}")
-    
+        return 0
+
+async def main():
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"job_listings_{timestamp}.jsonl"
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    started = time.perf_counter()
+
+    async with HttpClient(timeout=TIMEOUT, retries=MAX_RETRIES, headers=headers) as client:
+        scheduler = CrawlScheduler(client)
+        counts = await asyncio.gather(*(crawl_job_site(scheduler, url, filename) for url in urls))
+    page_counts = dict(zip(urls, counts))
+
     # Print summary of results
     print("\n\n===== SUMMARY =====")
-    for url, data in results.items():
-        page_count = len(data.get('data', []))
+    for url, page_count in page_counts.items():
         print(f"{url}: {page_count} pages crawled")
-    
-    # Save results to JSON file
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"job_listings_{timestamp}.json"
-    
-    # Only save if we have results
-    if results and any(len(data.get('data', [])) > 0 for data in results.values()):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Total time: {time.perf_counter() - started:.0f}s")
+
+    if any(page_counts.values()):
         print(f"\nResults saved to {filename}")
     else:
         print("\nNo data to save in the results.")
-        
-        # Save the raw results for debugging
-        debug_filename = f"debug_raw_results_{timestamp}.json"
-        with open(debug_filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        print(f"Empty or minimal results saved to {debug_filename} for debugging")
+    finish_run("crawl")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
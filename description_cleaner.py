@@ -1,17 +1,32 @@
 import os
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
+from llm_cache import cache_key, shared_cache
+from llm_engine import BASE_URL, LLMEngine
+from metrics import finish_run, metrics
+from boilerplate import CONFIDENCE_THRESHOLD, strip_boilerplate
+from seen_index import job_key, shared_index
+from jsonl_io import load_json, merge_by_key, write_json
 
 load_dotenv()
 
 client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
+    base_url=BASE_URL,
     api_key=os.getenv("OPENAI_API_KEY"),
 )
+async_client = AsyncOpenAI(
+    base_url=BASE_URL,
+    api_key=os.getenv("OPENAI_API_KEY"),
+)
+
+MODEL = "deepseek/deepseek-chat-v3-0324:free"
+CLEAN_SYSTEM_PROMPT = "You clean scraped job pages down to the job description."
 
-def clean_description(raw_text, model="deepseek/deepseek-chat-v3-0324:free"):
-    prompt = f"""
+engine = LLMEngine(async_client, MODEL, CLEAN_SYSTEM_PROMPT)
+
+def clean_prompt(text):
+    return f"""
 You are a smart job listing parser.
 
 From the messy text below, extract ONLY a clear and concise job description.
@@ -20,20 +35,65 @@ Remove unrelated content like navigation menus, footers, social links, blogs, te
 Return ONLY the cleaned-up job description as plain text. Do not include any extra formatting.
 
 ### RAW TEXT STARTS:
-{raw_text.strip()[:6000]}
+{text.strip()[:6000]}
 """
 
+def clean_messages(prompt):
+    # The same system + user pair LLMEngine sends, so both paths share one
+    # cache key per page.
+    return [
+        {"role": "system", "content": CLEAN_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def _plan(raw_text):
+    """(cleaned text, "heuristic") when no LLM call is needed, else (prompt, None)."""
+    # Strip navigation/footers locally; the LLM only sees pages the
+    # heuristic is unsure about, and then only the reduced text.
+    with metrics.timer("clean_heuristic_seconds"):
+        reduced, confidence = strip_boilerplate(raw_text)
+    if confidence >= CONFIDENCE_THRESHOLD:
+        metrics.inc("clean_items_total", path="heuristic")
+        return reduced, "heuristic"
+    return clean_prompt(reduced or raw_text), None
+
+async def clean_description_async(raw_text):
+    """Clean one page through the shared rate-limited engine.
+
+    Returns (text, status); status is "heuristic", "llm" or "failed", and
+    a failed page comes back as the raw text.
+    """
+    prompt, status = _plan(raw_text)
+    if status:
+        return prompt, status
+    metrics.inc("clean_items_total", path="llm")
+    cleaned = await engine.complete(prompt)
+    return (cleaned.strip(), "llm") if cleaned else (raw_text, "failed")
+
+def clean_description(raw_text, model=MODEL):
+    """Blocking clean_description_async: same prompt, same cache entry, same (text, status)."""
+    prompt, status = _plan(raw_text)
+    if status:
+        return prompt, status
+    metrics.inc("clean_items_total", path="llm")
+    cache = shared_cache()
+    key = cache_key(model, CLEAN_SYSTEM_PROMPT, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached.strip(), "llm"
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content.strip()
+        with metrics.timer("llm_request_seconds", model=model):
+            response = client.chat.completions.create(model=model, messages=clean_messages(prompt))
+        usage = getattr(response, "usage", None)
+        metrics.inc("llm_prompt_tokens_total", getattr(usage, "prompt_tokens", None) or 0, model=model)
+        metrics.inc("llm_completion_tokens_total", getattr(usage, "completion_tokens", None) or 0, model=model)
+        content = response.choices[0].message.content
+        cache.put(key, content)
+        return content.strip(), "llm"
     except Exception as e:
+        metrics.inc("llm_failures_total", model=model)
         print("❌ Failed to clean description:", e)
-        return raw_text
+        return raw_text, "failed"
 
 if __name__ == "__main__":
     INPUT = "results/extracted_jobs_full.json"
@@ -43,10 +103,28 @@ if __name__ == "__main__":
         data = json.load(f)
 
     print("🧼 Cleaning extracted job descriptions...")
+    index = shared_index()
+    fresh, cleaned = [], []
     for job in data.get("included", []):
-        if job.get("description"):
-            job["description"] = clean_description(job["description"])
+        raw = job.get("description")
+        if raw and not index.is_new("clean", job_key(job), raw):
+            continue
+        if raw:
+            job["description"], status = clean_description(raw)
+            if status != "failed":
+                cleaned.append((job, raw))
+        fresh.append(job)
+
+    # Merged into the last run's output so nothing unread is lost; pages are
+    # marked cleaned only once that file is written.
+    previous = load_json(OUTPUT, {})
+    data["included"] = merge_by_key(previous.get("included", []), fresh, job_key)
+    data["discarded"] = merge_by_key(previous.get("discarded", []), data.get("discarded", []), job_key)
+    write_json(OUTPUT, data)
+    print(f"\n💾 Cleaned descriptions saved to: {OUTPUT}")
+    for job, raw in cleaned:
+        index.mark("clean", job_key(job), raw, url=job.get("url"))
 
-    with open(OUTPUT, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-        print(f"\n💾 Cleaned descriptions saved to: {OUTPUT}")
+    stats = shared_cache().stats()
+    print(f"📦 LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+    finish_run("clean")
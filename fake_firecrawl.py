@@ -0,0 +1,151 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawl_reader import iter_crawl_pages
+
+# === FAKE SERVER SETTINGS ===
+RECORDED_CRAWL = "job_listings_20250415_171223.json"
+PAGES_PER_RESPONSE = 2
+
+
+def load_recorded_pages(path=RECORDED_CRAWL):
+    """Recorded pages per website, replayed for matching crawl URLs."""
+    recorded = {}
+    try:
+        for website, status, metadata, markdown in iter_crawl_pages(path):
+            recorded.setdefault(website, []).append({"markdown": markdown, "metadata": metadata})
+    except FileNotFoundError:
+        pass
+    return recorded
+
+
+def synthetic_pages(url, count):
+    return [{
+        "markdown": f"## [Data Scientist {i}]({url}/job/{i})\nExample Corp\nToronto, ON\n$90K - $120K (Employer est.)",
+        "metadata": {"url": url, "sourceURL": url, "statusCode": 200},
+    } for i in range(count)]
+
+
+class FakeFirecrawl:
+    """In-memory crawl jobs that finish after `crawl_seconds`."""
+
+    def __init__(self, crawl_seconds=10.0, crawls_per_min=1, error_rate=0.0, fail_rate=0.0):
+        self.crawl_seconds = crawl_seconds
+        self.crawls_per_min = crawls_per_min
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.recorded = load_recorded_pages()
+        self.jobs = {}
+        self.submits = deque()
+        self.lock = threading.Lock()
+
+    def submit(self, body):
+        """Return (status, payload, headers) for POST /v1/crawl."""
+        now = time.monotonic()
+        with self.lock:
+            while self.submits and now - self.submits[0] >= 60:
+                self.submits.popleft()
+            if len(self.submits) >= self.crawls_per_min:
+                retry_after = 60 - (now - self.submits[0])
+                return 429, {"success": False, "error": "Rate limit exceeded"}, {"Retry-After": f"{retry_after:.0f}"}
+            self.submits.append(now)
+            url = body.get("url", "")
+            limit = body.get("limit", 3)
+            pages = self.recorded.get(url) or synthetic_pages(url, limit)
+            crawl_id = str(uuid.uuid4())
+            self.jobs[crawl_id] = {
+                "started": now,
+                "pages": pages[:limit],
+                "failed": random.random() < self.fail_rate,
+            }
+        return 200, {"success": True, "id": crawl_id, "url": f"/v1/crawl/{crawl_id}"}, {}
+
+    def status(self, crawl_id, skip, base_url):
+        job = self.jobs.get(crawl_id)
+        if job is None:
+            return 404, {"success": False, "error": "Crawl not found"}, {}
+        elapsed = time.monotonic() - job["started"]
+        total = len(job["pages"])
+        if job["failed"] and elapsed >= self.crawl_seconds / 2:
+            return 200, {"status": "failed", "total": total, "completed": 0, "data": []}, {}
+        if elapsed < self.crawl_seconds:
+            completed = int(total * elapsed / self.crawl_seconds)
+            return 200, {"status": "scraping", "total": total, "completed": completed, "data": []}, {}
+        payload = {
+            "status": "completed",
+            "total": total,
+            "completed": total,
+            "data": job["pages"][skip:skip + PAGES_PER_RESPONSE],
+        }
+        if skip + PAGES_PER_RESPONSE < total:
+            payload["next"] = f"{base_url}/v1/crawl/{crawl_id}?skip={skip + PAGES_PER_RESPONSE}"
+        return 200, payload, {}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload, headers):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _flaky(self):
+            if random.random() < fake.error_rate:
+                self._send(503, {"success": False, "error": "Injected failure"}, {})
+                return True
+            return False
+
+        def do_POST(self):
+            if self._flaky():
+                return
+            if self.path.rstrip("/") != "/v1/crawl":
+                return self._send(404, {"success": False, "error": "Not found"}, {})
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            self._send(*fake.submit(body))
+
+        def do_GET(self):
+            if self._flaky():
+                return
+            path, _, query = self.path.partition("?")
+            if not path.startswith("/v1/crawl/"):
+                return self._send(404, {"success": False, "error": "Not found"}, {})
+            params = dict(part.split("=", 1) for part in query.split("&") if "=" in part)
+            base_url = f"http://{self.headers.get('Host')}"
+            self._send(*fake.status(path.rsplit("/", 1)[-1], int(params.get("skip", 0)), base_url))
+
+        def log_message(self, format, *args):
+            print(f"🧪 {self.command} {self.path} → {args[1] if len(args) > 1 else ''}")
+
+    return Handler
+
+
+def serve(port=3002, **settings):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(FakeFirecrawl(**settings)))
+    print(f"🧪 Fake Firecrawl on http://127.0.0.1:{port} "
+          f"(crawl {settings.get('crawl_seconds', 10.0)}s, {settings.get('crawls_per_min', 1)} crawls/min)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    # FIRECRAWL_API_URL=http://127.0.0.1:3002 python crawlai.py
+    parser = argparse.ArgumentParser(description="Local stand-in for the Firecrawl crawl API")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--crawl-seconds", type=float, default=10.0, help="time until a crawl completes")
+    parser.add_argument("--crawls-per-min", type=int, default=1, help="submissions allowed per minute before 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of crawls that end as failed")
+    args = parser.parse_args()
+    serve(args.port, crawl_seconds=args.crawl_seconds, crawls_per_min=args.crawls_per_min,
+          error_rate=args.error_rate, fail_rate=args.fail_rate)
@@ -0,0 +1,256 @@
+import argparse
+import glob
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === FAKE SERVER SETTINGS ===
+RECORDED_SEARCHES = "cache/*.json"
+STREAM_CHUNK_WORDS = 4
+# Share of the latency spent before the first streamed token.
+FIRST_TOKEN_SHARE = 0.25
+
+LETTER = ("Dear Hiring Manager,\n\nI am excited to apply for the {title} role. My background in Python, "
+          "SQL and machine learning maps closely to what the team needs, and I have shipped data products "
+          "end to end, from pipelines to dashboards. I would welcome the chance to bring that experience "
+          "to your team and to learn from it.\n\nSincerely,\nThe Candidate")
+
+PROFILE = {
+    "name": "Benchmark Candidate",
+    "headline": "Data scientist working in Python and SQL",
+    "skills": ["Python", "SQL", "Machine Learning", "Pandas", "AWS"],
+    "roles": [{"title": "Data Scientist", "company": "Example Corp", "period": "2021-2025",
+               "highlights": ["Cut reporting time by 40%"]}],
+    "achievements": ["Shipped three models to production"],
+    "education": ["MSc Data Science, University of Toronto, 2021"],
+    "contact": "Toronto, ON",
+}
+
+
+def load_recorded_searches(pattern=RECORDED_SEARCHES):
+    """SerpAPI responses cached by contact_finder, replayed for /search.json."""
+    searches = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict) and "organic_results" in data:
+            searches.append(data)
+    return searches or [{"organic_results": [
+        {"title": "Jane Doe - CEO - Example Corp | LinkedIn", "link": "https://www.linkedin.com/in/example",
+         "snippet": "Toronto, Ontario · CEO at Example Corp"}
+    ]}]
+
+
+def listing_title(text):
+    match = re.search(r'\[(.+?)\]', text)
+    if match:
+        return match.group(1).strip()
+    return next((line.strip("# ").strip() for line in text.splitlines() if line.strip()), "Data Scientist")
+
+
+def extraction(text):
+    skills = [skill for skill in ("Python", "SQL", "AWS", "Spark", "Pandas") if skill.lower() in text.lower()]
+    return {
+        "title": listing_title(text),
+        "company": "Not Available",
+        "location": "Toronto, ON",
+        "salary_range": {"min": None, "max": None, "currency": "CAD"},
+        "employment_type": "Full-time",
+        "work_arrangement": "Hybrid",
+        "skills": {"technical": skills or ["Not Available"], "soft": ["Communication"]},
+        "experience": {"years": None, "level": "Not Available"},
+        "responsibilities": ["Not Available"],
+        "qualifications": {"required": ["Not Available"], "preferred": ["Not Available"]},
+    }
+
+
+def reply_for(messages):
+    """(kind, content) shaped like what each caller's prompt asks for."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    if "### LISTING" in user:
+        listings = re.split(r'^### LISTING (\d+)\n', user, flags=re.MULTILINE)[1:]
+        return "batch", json.dumps([{"id": int(listing_id), **extraction(text)}
+                                    for listing_id, text in zip(listings[::2], listings[1::2])])
+    if "extracting structured information" in system:
+        return "extract", json.dumps(extraction(user))
+    if "smart job listing parser" in user:
+        raw = user.split("### RAW TEXT STARTS:", 1)[-1].strip()
+        return "clean", raw[:1500]
+    if "compact JSON profile" in user:
+        return "profile", json.dumps(PROFILE)
+    return "letter", LETTER.format(title=listing_title(user.split("### JOB DESCRIPTION:", 1)[-1]))
+
+
+def usage_for(messages, content):
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    completion_tokens = len(content) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+class FakeLLM:
+    """Canned chat completions with injected latency, 500s and 429s."""
+
+    def __init__(self, latency=0.5, jitter=0.5, error_rate=0.0, throttle_rate=0.0, rpm=0, retry_after=1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rpm = rpm
+        self.retry_after = retry_after
+        self.searches = load_recorded_searches()
+        self.recent = deque()
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "in_flight": 0, "peak_in_flight": 0, "kinds": {}}
+
+    def delay(self):
+        return max(0.0, self.latency * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def admit(self):
+        """None to serve the request, or (status, payload, headers) to reject it."""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            if random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 500, {"error": {"message": "Injected failure", "code": 500}}, {}
+            while self.recent and now - self.recent[0] >= 60:
+                self.recent.popleft()
+            throttled = random.random() < self.throttle_rate
+            if self.rpm and len(self.recent) >= self.rpm:
+                throttled = True
+            if throttled:
+                self.stats["throttled"] += 1
+                return 429, {"error": {"message": "Rate limit exceeded", "code": 429}}, \
+                    {"Retry-After": f"{self.retry_after:g}"}
+            self.recent.append(now)
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        return None
+
+    def served(self, kind):
+        with self.lock:
+            self.stats["in_flight"] -= 1
+            self.stats["kinds"][kind] = self.stats["kinds"].get(kind, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _chunk(self, payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _stream(self, model, content, usage, delay):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(delay * FIRST_TOKEN_SHARE)
+            words = content.split(" ")
+            parts = [" ".join(words[i:i + STREAM_CHUNK_WORDS]) + " " for i in range(0, len(words), STREAM_CHUNK_WORDS)]
+            for part in parts:
+                self._chunk(json.dumps({"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                                        "model": model, "choices": [{"index": 0, "delta": {"content": part},
+                                                                     "finish_reason": None}]}))
+                time.sleep(delay * (1 - FIRST_TOKEN_SHARE) / len(parts))
+            self._chunk(json.dumps({"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                                    "model": model, "choices": [], "usage": usage}))
+            self._chunk("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": "Not found"}})
+            rejected = fake.admit()
+            if rejected:
+                return self._send(*rejected)
+            kind, content = reply_for(body.get("messages", []))
+            usage = usage_for(body.get("messages", []), content)
+            model = body.get("model", "fake")
+            try:
+                if body.get("stream"):
+                    self._stream(model, content, usage, fake.delay())
+                else:
+                    time.sleep(fake.delay())
+                    self._send(200, {"id": "fake", "object": "chat.completion", "created": int(time.time()),
+                                     "model": model, "usage": usage,
+                                     "choices": [{"index": 0, "finish_reason": "stop",
+                                                  "message": {"role": "assistant", "content": content}}]})
+            finally:
+                fake.served(kind)
+
+        def do_GET(self):
+            path = self.path.partition("?")[0].rstrip("/")
+            if path == "/stats":
+                return self._send(200, fake.snapshot())
+            if path == "/search.json":
+                rejected = fake.admit()
+                if rejected:
+                    return self._send(*rejected)
+                time.sleep(fake.delay())
+                fake.served("search")
+                return self._send(200, random.choice(fake.searches))
+            self._send(404, {"error": {"message": "Not found"}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start(port=3020, **settings):
+    """Serve from a background thread; returns (server, fake)."""
+    fake = FakeLLM(**settings)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fake
+
+
+if __name__ == "__main__":
+    # LLM_BASE_URL=http://127.0.0.1:3020/v1 python visual_job_extractor.py
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for offline runs")
+    parser.add_argument("--port", type=int, default=3020)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency varies by ± this share")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="requests allowed per minute before 429 (0 = no limit)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+    server, fake = start(args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         throttle_rate=args.throttle_rate, rpm=args.rpm, retry_after=args.retry_after)
+    print(f"🧪 Fake LLM on http://127.0.0.1:{args.port}/v1 "
+          f"(latency {args.latency}s ±{args.jitter:.0%}, {len(fake.searches)} recorded searches)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+import httpx
+from http_client import HttpClient
+from metrics import metrics
+
+# === FETCH SETTINGS ===
+STATE_PATH = "results/feed_state.json"
+
+
+def load_state(path=STATE_PATH):
+    if not Path(path).exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+async def fetch_feed(client, source, url, source_state):
+    try:
+        result = await client.get(url, cache=True)
+    except httpx.HTTPError as e:
+        print(f"❌ Error fetching feed for {source}: {e}")
+        source_state.update({"url": url, "error": str(e), "latency_ms": None})
+        return None
+
+    # A 304 carries no body; the one returned is the stored copy.
+    transferred = 0 if result.from_cache else len(result.content)
+    metrics.observe("feed_fetch_seconds", result.latency_ms / 1000, source=source)
+    metrics.inc("feed_bytes_total", transferred, source=source)
+    if result.from_cache:
+        metrics.inc("feed_not_modified_total", source=source)
+        # A 304 may leave out the validators; the ones sent still hold.
+        validators = {"etag": result.headers.get("etag") or source_state.get("etag"),
+                      "last_modified": result.headers.get("last-modified") or source_state.get("last_modified")}
+    elif result.ok:
+        validators = {"etag": result.headers.get("etag"), "last_modified": result.headers.get("last-modified")}
+    else:
+        print(f"❌ Feed {source} returned HTTP {result.status}")
+        validators = {}
+    source_state.update({
+        "url": url,
+        "status": 304 if result.from_cache else result.status,
+        "latency_ms": result.latency_ms,
+        "bytes": transferred,
+        **validators,
+        "fetched_at": datetime.now().isoformat(),
+        "error": None
+    })
+    return result.content if result.ok else None
+
+
+async def fetch_feeds(feeds, state_path=STATE_PATH, client=None):
+    """Fetch {source: url} concurrently with conditional GETs.
+
+    Returns {source: body bytes or None}. A 304 answer is served from the
+    body stored on the previous run, so callers always see the full feed.
+    """
+    state = load_state(state_path)
+    owned = client is None
+    client = client or HttpClient()
+    try:
+        bodies = await asyncio.gather(*(
+            fetch_feed(client, source, url, state.setdefault(source, {}))
+            for source, url in feeds.items()
+        ))
+    finally:
+        if owned:
+            await client.aclose()
+    save_state(state, state_path)
+    return dict(zip(feeds.keys(), bodies))
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+from metrics import metrics
+
+# === HTTP SETTINGS ===
+TIMEOUT = httpx.Timeout(20.0, connect=10.0)
+MAX_CONNECTIONS = 20
+PER_HOST_LIMIT = 4
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+CACHE_DIR = "cache/http"
+USER_AGENT = "Mozilla/5.0 (compatible; TaylorAI job fetcher)"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A POST whose response was lost may already have been acted on (a crawl
+# submitted and billed), so other methods only retry when the server cannot
+# have seen the request: a 429, or a connection that was never made.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class HttpResult(namedtuple("HttpResult", ["url", "status", "content", "headers", "from_cache", "latency_ms"])):
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def request_key(url, params=None):
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+
+def backoff(attempt, retry_after=None):
+    """Full-jitter exponential backoff, or the server's Retry-After if given."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(response):
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class HttpClient:
+    """Pooled async HTTP client shared by the fetchers.
+
+    - one httpx connection pool with keep-alive and timeouts
+    - at most `per_host` requests in flight per host
+    - retries with jittered backoff on transport errors, 429 and 5xx
+      (POST and PATCH only on 429 and connect errors)
+    - GETs are fetched at most once per client: repeat calls for the same
+      URL share the first result (pass fresh=True for polling)
+    - cache=True keeps the body on disk and revalidates with ETag /
+      Last-Modified, serving the stored body on 304
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, per_host=PER_HOST_LIMIT, timeout=TIMEOUT,
+                 retries=MAX_RETRIES, cache_dir=CACHE_DIR, headers=None):
+        self.per_host = per_host
+        self.retries = retries
+        self.cache_dir = Path(cache_dir)
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections),
+            headers={"User-Agent": USER_AGENT, **(headers or {})},
+            follow_redirects=True,
+        )
+        self._hosts = {}
+        self._once = {}
+        self.stats = {"requests": 0, "retries": 0, "deduped": 0, "not_modified": 0, "bytes": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def request(self, method, url, limiter=None, **kwargs):
+        """Send with retries; returns the final httpx.Response.
+
+        With a RateLimiter, each attempt acquires a slot first and a 429
+        pauses the limiter for every caller sharing it.
+        """
+        host = urlsplit(url).netloc
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            started = time.perf_counter()
+            try:
+                async with self._host_slot(url):
+                    self.stats["requests"] += 1
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                metrics.inc("http_requests_total", host=host, status="error")
+                if attempt == self.retries or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                    raise
+                wait = backoff(attempt)
+                logging.warning(f"⚠️ {method} {url} failed ({e}); retrying in {wait:.1f}s")
+            else:
+                metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+                metrics.inc("http_requests_total", host=host, status=response.status_code)
+                retry = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 429)
+                if not retry or attempt == self.retries:
+                    self.stats["bytes"] += len(response.content)
+                    metrics.inc("http_bytes_total", len(response.content), host=host)
+                    return response
+                wait = backoff(attempt, _retry_after(response))
+                logging.warning(f"⚠️ {method} {url} returned {response.status_code}; retrying in {wait:.1f}s")
+                if response.status_code == 429 and limiter is not None:
+                    limiter.pause(wait)
+                    wait = 0
+            self.stats["retries"] += 1
+            metrics.inc("http_retries_total", host=host)
+            await asyncio.sleep(wait)
+
+    async def get(self, url, params=None, headers=None, cache=False, fresh=False):
+        key = request_key(url, params)
+        if fresh:
+            return await self._get(url, params, headers, cache)
+        if key in self._once:
+            self.stats["deduped"] += 1
+            metrics.inc("http_deduped_total")
+        else:
+            self._once[key] = asyncio.ensure_future(self._get(url, params, headers, cache))
+        return await asyncio.shield(self._once[key])
+
+    def _cache_paths(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.body", self.cache_dir / f"{digest}.json"
+
+    async def _get(self, url, params, headers, cache):
+        headers = dict(headers or {})
+        body_path = meta_path = None
+        meta = {}
+        if cache:
+            body_path, meta_path = self._cache_paths(request_key(url, params))
+            if body_path.exists() and meta_path.exists():
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+        started = time.perf_counter()
+        response = await self.request("GET", url, params=params, headers=headers)
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if cache and response.status_code == 304 and meta:
+            self.stats["not_modified"] += 1
+            metrics.inc("http_not_modified_total", host=urlsplit(url).netloc)
+            return HttpResult(url, 200, body_path.read_bytes(), dict(response.headers), True, latency_ms)
+        if cache and response.is_success:
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            body_path.write_bytes(response.content)
+            meta_path.write_text(json.dumps({
+                "url": url,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "fetched_at": datetime.now().isoformat(),
+            }), encoding="utf-8")
+        return HttpResult(url, response.status_code, response.content, dict(response.headers), False, latency_ms)
+
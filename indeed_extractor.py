@@ -1,10 +1,21 @@
-import json
-import re
 import logging
 import datetime
 import os
+import asyncio
+import argparse
 from dotenv import load_dotenv
 import openai
+from llm_engine import BASE_URL, LLMEngine, run_bounded
+from rule_extractor import llm_prompt, merge, missing_fields, rule_extract
+from crawl_reader import iter_crawl_pages
+from listing_segmenter import split_indeed
+from jsonl_io import Checkpoint, append_jsonl, iter_jsonl
+from llm_cache import shared_cache
+from seen_index import content_hash, shared_index
+from near_dup_index import listing_key, shared_near_dups
+from metrics import finish_run, metrics
+from job_store import shared_store
+from job_index import shared_job_index
 
 # Setup logging
 logging.basicConfig(
@@ -22,9 +33,9 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found.")
 
-client = openai.OpenAI(
+client = openai.AsyncOpenAI(
     api_key=api_key,
-    base_url="https://openrouter.ai/api/v1",
+    base_url=BASE_URL,
     default_headers={
         "HTTP-Referer": "http://localhost:5000",
         "X-Title": "Indeed Extractor"
@@ -33,7 +44,8 @@ client = openai.OpenAI(
 
 MODEL = "meta-llama/llama-4-scout:free"
 INPUT_FILE = "job_listings_20250415_171223.json"
-OUTPUT_FILE = "indeed_structured_jobs.json"
+OUTPUT_FILE = "indeed_structured_jobs.jsonl"
+CHECKPOINT_FILE = "indeed_structured_jobs.checkpoint"
 
 SYSTEM_PROMPT = """You are an expert at extracting structured information from job listings.
 Always return valid JSON with this schema. Fill missing values with \"Not Available\" or null:
@@ -62,69 +74,102 @@ Always return valid JSON with this schema. Fill missing values with \"Not Availa
 Return only valid JSON with no extra text.
 """
 
-def call_llm(prompt):
-    try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        content = response.choices[0].message.content.strip()
-        if "```" in content:
-            content = re.search(r'```(?:json)?(.*?)```', content, re.DOTALL)
-            if content:
-                content = content.group(1).strip()
-        return json.loads(content)
-    except Exception as e:
-        logging.error(f"❌ LLM call failed: {e}")
-        return None
+engine = LLMEngine(client, MODEL, SYSTEM_PROMPT)
+
+async def call_llm(prompt):
+    structured = await engine.complete_json(prompt)
+    if structured is None:
+        logging.error("❌ LLM call failed")
+    return structured
 
 def extract_indeed_jobs(markdown):
     logging.info("🔍 Extracting jobs from Indeed")
-    job_chunks = []
-
-    # Table row format: | ## [Job Title](url) ... |
-    table_rows = re.findall(r'\|\s*##\s*\[(.*?)\](.*?)\|\s*\|', markdown, re.DOTALL)
-    if table_rows:
-        logging.info(f"📄 Found {len(table_rows)} table-style listings")
-        for title, content in table_rows:
-            job_text = f"## [{title}]{content}"
-            job_chunks.append(job_text)
-
+    # Table rows of the form: | ## [Job Title](url) ... | |
+    job_chunks = split_indeed(markdown)
     logging.info(f"✅ Extracted {len(job_chunks)} Indeed job chunks")
     return job_chunks
 
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
-
-    extracted_jobs = []
-    for website_key, website_data in raw_data.items():
-        if "indeed" not in website_key.lower() or website_data.get("status") != "completed":
+async def process_chunk(chunk, website_key, metadata):
+    with metrics.timer("extract_rules_seconds"):
+        record, confidence = rule_extract(chunk)
+    missing = missing_fields(chunk, confidence)
+    metrics.inc("extract_items_total", path="llm" if missing else "rules")
+    if missing:
+        structured = await call_llm(llm_prompt(chunk, missing))
+        structured = merge(record, confidence, structured) if structured else None
+    else:
+        structured = record
+    if structured:
+        structured["source"] = {
+            "website": website_key,
+            "original_url": metadata.get("url", ""),
+            "extraction_date": datetime.datetime.now().isoformat()
+        }
+        shared_index().mark("extract", content_hash(chunk), chunk, url=metadata.get("url"))
+    return structured
+
+def iter_chunks(pages, checkpoint):
+    processed_hashes = set()
+    page_counts = {}
+    index = shared_index()
+    near_dups = shared_near_dups()
+    for website_key, status, metadata, markdown in pages:
+        page_index = page_counts.get(website_key, 0)
+        page_counts[website_key] = page_index + 1
+        if "indeed" not in website_key.lower() or status != "completed":
             continue
 
-        for page_data in website_data.get("data", []):
-            markdown = page_data.get("markdown", "")
-            metadata = page_data.get("metadata", {})
-
-            job_chunks = extract_indeed_jobs(markdown)
-            for chunk in job_chunks:
-                prompt = f"Extract job information from this listing:\n\n{chunk}"
-                structured = call_llm(prompt)
-
-                if structured:
-                    structured["source"] = {
-                        "website": website_key,
-                        "original_url": metadata.get("url", ""),
-                        "extraction_date": datetime.datetime.now().isoformat()
-                    }
-                    extracted_jobs.append(structured)
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(extracted_jobs, f, indent=2)
-    logging.info(f"🟢 Saved {len(extracted_jobs)} jobs to {OUTPUT_FILE}")
+        job_chunks = extract_indeed_jobs(markdown)
+        for chunk_index, chunk in enumerate(job_chunks):
+            key = (website_key, page_index, chunk_index)
+            chunk_hash = content_hash(chunk)
+            if checkpoint.done(key) or chunk_hash in processed_hashes:
+                continue
+            if not index.is_new("extract", chunk_hash, chunk):
+                continue
+            processed_hashes.add(chunk_hash)
+            # The same posting seen on another board is extracted once; keyed
+            # by the card's link so an edited posting replaces its old text.
+            if not near_dups.is_representative(listing_key(chunk), chunk, source=website_key):
+                continue
+            yield key, chunk, metadata
+
+async def main(resume=False):
+    if not resume and os.path.exists(OUTPUT_FILE):
+        os.remove(OUTPUT_FILE)
+    checkpoint = Checkpoint(CHECKPOINT_FILE, resume=resume)
+    if resume:
+        logging.info(f"⏩ Resuming {OUTPUT_FILE}: {len(checkpoint)} chunks already done")
+
+    saved = 0
+
+    async def handle(item):
+        nonlocal saved
+        key, chunk, metadata = item
+        with metrics.timer("extract_item_seconds"):
+            structured = await process_chunk(chunk, key[0], metadata)
+        if structured:
+            append_jsonl(OUTPUT_FILE, structured)
+            checkpoint.mark(key)
+            saved += 1
+            metrics.inc("items_total", stage="extract", result="saved")
+
+    await run_bounded(iter_chunks(iter_crawl_pages(INPUT_FILE), checkpoint), handle)
+
+    stats = shared_cache().stats()
+    logging.info(f"📦 LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+    logging.info(f"🟢 Saved {saved} jobs to {OUTPUT_FILE}")
+    if saved:
+        # The whole file goes in, so a resumed run's earlier jobs are stored
+        # too; compaction drops any repeats.
+        stored = shared_store().append(iter_jsonl(OUTPUT_FILE))
+        logging.info(f"🗄️  Appended {stored} jobs to the job store")
+        indexed = shared_job_index().upsert(iter_jsonl(OUTPUT_FILE))
+        logging.info(f"🔎 {indexed} jobs added or updated in the search index")
+    finish_run("indeed_extract")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract structured Indeed jobs from a Firecrawl dump")
+    parser.add_argument("--resume", action="store_true", help="continue the last run, skipping completed chunks")
+    args = parser.parse_args()
+    asyncio.run(main(resume=args.resume))
@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from jsonl_io import iter_jobs
+from rule_extractor import NOT_AVAILABLE
+from seen_index import canonical_url, content_hash
+
+# === INDEX SETTINGS ===
+INDEX_PATH = os.getenv("JOB_INDEX_PATH", "results/job_index.sqlite")
+ENABLED = os.getenv("JOB_INDEX", "on").lower() not in ("0", "off", "false", "no")
+# BM25 column weights: a title hit counts most, then duties, then body text.
+BM25_WEIGHTS = (5.0, 1.0, 2.0)
+FACETS = ("location", "employment_type", "work_arrangement", "experience_level")
+SNIPPET_TOKENS = 12
+UPSERT_BATCH = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    url TEXT,
+    title TEXT,
+    company TEXT,
+    location TEXT COLLATE NOCASE,
+    employment_type TEXT COLLATE NOCASE,
+    work_arrangement TEXT COLLATE NOCASE,
+    experience_level TEXT COLLATE NOCASE,
+    salary_min REAL,
+    salary_max REAL,
+    source TEXT,
+    description TEXT,
+    responsibilities TEXT,
+    content_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs (location);
+CREATE INDEX IF NOT EXISTS jobs_employment_type ON jobs (employment_type);
+CREATE INDEX IF NOT EXISTS jobs_work_arrangement ON jobs (work_arrangement);
+CREATE INDEX IF NOT EXISTS jobs_experience_level ON jobs (experience_level);
+CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5 (
+    title, description, responsibilities,
+    content='jobs', content_rowid='id', tokenize='porter unicode61'
+);
+
+-- Keep the external-content FTS table in step with jobs.
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, title, description, responsibilities)
+    VALUES (new.id, new.title, new.description, new.responsibilities);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, description, responsibilities)
+    VALUES ('delete', old.id, old.title, old.description, old.responsibilities);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, description, responsibilities)
+    VALUES ('delete', old.id, old.title, old.description, old.responsibilities);
+    INSERT INTO jobs_fts (rowid, title, description, responsibilities)
+    VALUES (new.id, new.title, new.description, new.responsibilities);
+END;
+"""
+
+COLUMNS = ("key", "url", "title", "company", "location", "employment_type", "work_arrangement",
+           "experience_level", "salary_min", "salary_max", "source", "description", "responsibilities",
+           "content_hash", "updated_at", "record")
+
+
+def _text(value):
+    if isinstance(value, list):
+        value = "\n".join(_text(v) or "" for v in value).strip()
+    if value is None or isinstance(value, dict):
+        return None
+    value = str(value).strip()
+    return value if value and value != NOT_AVAILABLE else None
+
+
+def _number(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _stable(job):
+    """The job without per-run fields, so re-extracting a posting hashes the same."""
+    source = job.get("source")
+    if isinstance(source, dict) and "extraction_date" in source:
+        job = {**job, "source": {k: v for k, v in source.items() if k != "extraction_date"}}
+    return json.dumps(job, ensure_ascii=False, sort_keys=True)
+
+
+def job_row(job, now=None):
+    """Column values for a feed job or an extractor record."""
+    source = job.get("source")
+    salary = job.get("salary_range") if isinstance(job.get("salary_range"), dict) else {}
+    experience = job.get("experience") if isinstance(job.get("experience"), dict) else {}
+    skills = job.get("skills") if isinstance(job.get("skills"), dict) else {}
+    quals = job.get("qualifications") if isinstance(job.get("qualifications"), dict) else {}
+    # Extractor records carry no description; their skills and requirements
+    # are the body text worth searching.
+    body = _text(job.get("description")) or _text(
+        [_text(skills.get("technical")), _text(skills.get("soft")),
+         _text(quals.get("required")), _text(quals.get("preferred"))])
+    record = json.dumps(job, ensure_ascii=False, sort_keys=True)
+    digest = content_hash(_stable(job))
+    return {
+        # Only a job's own URL is a key; an extractor's original_url is the
+        # search page shared by every listing on it. Without a URL the content
+        # is the key: title and company alone merge distinct postings for
+        # different cities and salaries.
+        "key": canonical_url(job.get("url", "")) or digest,
+        "url": job.get("url") or (source.get("original_url") if isinstance(source, dict) else None),
+        "title": _text(job.get("title")),
+        "company": _text(job.get("company")),
+        "location": _text(job.get("location")),
+        "employment_type": _text(job.get("employment_type")),
+        "work_arrangement": _text(job.get("work_arrangement")),
+        "experience_level": _text(experience.get("level")),
+        "salary_min": _number(salary.get("min")),
+        "salary_max": _number(salary.get("max")),
+        "source": source.get("website") if isinstance(source, dict) else _text(source),
+        "description": body,
+        "responsibilities": _text(job.get("responsibilities")),
+        "content_hash": digest,
+        "updated_at": now or time.time(),
+        "record": record,
+    }
+
+
+def fts_query(text):
+    """Free text to an FTS5 query: every word must match; `word*` is a prefix.
+
+    Words are quoted, so input like `c++` or `AND` cannot break the syntax.
+    """
+    terms = re.findall(r"[\w+#.]+\*?", text or "")
+    return " ".join(f'"{t.rstrip("*")}"*' if t.endswith("*") else f'"{t}"' for t in terms)
+
+
+class JobIndex:
+    """Full-text searchable job database with faceted filters.
+
+    Jobs are upserted by canonical URL (or content hash when there is no
+    URL); an unchanged posting is not rewritten, so re-indexing the same
+    files is cheap.
+    """
+
+    def __init__(self, path=INDEX_PATH, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def upsert(self, jobs):
+        """Insert new jobs and update changed ones; returns rows written."""
+        if not self.enabled:
+            return 0
+        sql = f"""
+            INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+            ON CONFLICT (key) DO UPDATE SET
+                {', '.join(f'{c} = excluded.{c}' for c in COLUMNS if c != 'key')}
+            WHERE jobs.content_hash != excluded.content_hash
+        """
+        written, batch, now = 0, [], time.time()
+        for job in jobs:
+            row = job_row(job, now)
+            batch.append(tuple(row[c] for c in COLUMNS))
+            if len(batch) >= UPSERT_BATCH:
+                written += self._write(sql, batch)
+                batch = []
+        if batch:
+            written += self._write(sql, batch)
+        return written
+
+    def _write(self, sql, batch):
+        with self._lock:
+            # rowcount skips the FTS trigger writes and unchanged rows.
+            written = self._conn.executemany(sql, batch).rowcount
+            self._conn.commit()
+            return written
+
+    def _scope(self, query, filters):
+        """FROM/WHERE SQL and params selecting the jobs that match."""
+        clauses, params = [], []
+        source = " FROM jobs"
+        if query and not fts_query(query):
+            # Nothing searchable (e.g. "!!!"): an empty MATCH is a syntax error.
+            clauses.append("0")
+        elif query:
+            # The MATCH drives the join, so only matching rows are visited.
+            source = " FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid"
+            clauses.append("jobs_fts MATCH ?")
+            params.append(fts_query(query))
+        for facet, value in filters.items():
+            if value is None:
+                continue
+            if facet not in FACETS:
+                raise ValueError(f"Unknown facet: {facet}")
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"jobs.{facet} IN ({', '.join('?' * len(values))})")
+            params += values
+        return source + (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def search(self, query=None, limit=20, offset=0, **filters):
+        """Best matches first (BM25), or newest first without a query.
+
+        Filters are facet=value or facet=[values], e.g. work_arrangement="Remote".
+        """
+        if not self.enabled or (query and not fts_query(query)):
+            return []
+        scope, params = self._scope(query, filters)
+        if query:
+            # bm25() is lower-is-better.
+            ranking = (f"bm25(jobs_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score, "
+                       f"snippet(jobs_fts, 1, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet")
+            order = "score"
+        else:
+            ranking, order = "NULL AS score, NULL AS snippet", "jobs.updated_at DESC"
+        sql = f"""
+            SELECT jobs.id, jobs.url, jobs.title, jobs.company, jobs.location, jobs.employment_type,
+                   jobs.work_arrangement, jobs.experience_level, jobs.salary_min, jobs.salary_max, {ranking}
+            {scope} ORDER BY {order} LIMIT ? OFFSET ?
+        """
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params + [limit, offset])]
+
+    def facets(self, query=None, top=10, **filters):
+        """{facet: [(value, count), ...]} over the jobs matching query + filters."""
+        if not self.enabled:
+            return {}
+        scope, params = self._scope(query, filters)
+        counts = {facet: Counter() for facet in FACETS}
+        # One pass over the matching rows instead of a MATCH per facet.
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = None
+            for row in cursor.execute(f"SELECT {', '.join(f'jobs.{f}' for f in FACETS)}{scope}", params):
+                for facet, value in zip(FACETS, row):
+                    if value is not None:
+                        counts[facet][value] += 1
+        return {facet: counter.most_common(top) for facet, counter in counts.items()}
+
+    def count(self, query=None, **filters):
+        if not self.enabled:
+            return 0
+        scope, params = self._scope(query, filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*){scope}", params).fetchone()[0]
+
+    def optimize(self):
+        """Merge FTS segments; worth running after a large bulk load."""
+        if self.enabled:
+            with self._lock:
+                self._conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+                self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+_shared_job_index = None
+
+
+def shared_job_index():
+    global _shared_job_index
+    if _shared_job_index is None:
+        _shared_job_index = JobIndex()
+    return _shared_job_index
+
+
+# === BENCHMARK ===
+QUERIES = [
+    ("data scientist", {}),
+    ("python machine learning", {}),
+    ("engineer", {"work_arrangement": "Remote"}),
+    ("analyst sql", {"location": "Toronto"}),
+    ("senior data", {"experience_level": "Senior", "employment_type": "Full-time"}),
+    ("pytorch llm*", {}),
+]
+
+
+def benchmark(total, seed_files, repeats=20):
+    jobs = [job for path in seed_files for job in iter_jobs(path)]
+    arrangements = ["Remote", "Hybrid", "On-site"]
+    levels = ["Entry", "Mid", "Senior"]
+
+    def synthetic():
+        rng = random.Random(7)
+        for i in range(total):
+            job = dict(rng.choice(jobs))
+            job["url"] = f"https://example.com/job/{i}"
+            job["work_arrangement"] = job.get("work_arrangement") or rng.choice(arrangements)
+            if not isinstance(job.get("experience"), dict):
+                job["experience"] = {"years": None, "level": rng.choice(levels)}
+            yield job
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index = JobIndex(os.path.join(workdir, "jobs.sqlite"), enabled=True)
+        started = time.perf_counter()
+        index.upsert(synthetic())
+        index.optimize()
+        print(f"📥 Indexed {index.count()} jobs in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        rewritten = index.upsert(synthetic())
+        print(f"🔁 Re-indexed the same jobs in {time.perf_counter() - started:.1f}s ({rewritten} rows rewritten)")
+
+        for query, filters in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                results = index.search(query, limit=20, **filters)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            matched = index.count(query, **filters)
+            print(f"🔎 {query!r} {filters or ''}: {matched} matches, top {len(results)} "
+                  f"p50 {timings[len(timings) // 2] * 1000:.1f} ms, max {timings[-1] * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        index.facets("data scientist")
+        print(f"📊 Facet counts for 'data scientist' in {(time.perf_counter() - started) * 1000:.1f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search indexed jobs with full text and facet filters")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("index", help="upsert JSON/JSONL job files")
+    add.add_argument("files", nargs="+")
+
+    find = commands.add_parser("search", help="full-text search with facet filters")
+    find.add_argument("query", nargs="?", help='e.g. "data scientist python" or "pytorch llm*"')
+    find.add_argument("--location", nargs="+")
+    find.add_argument("--type", nargs="+", dest="employment_type", help="e.g. Full-time")
+    find.add_argument("--arrangement", nargs="+", dest="work_arrangement", help="e.g. Remote Hybrid")
+    find.add_argument("--level", nargs="+", dest="experience_level", help="e.g. Senior")
+    find.add_argument("--limit", type=int, default=10)
+    find.add_argument("--facets", action="store_true", help="also print facet counts")
+
+    bench = commands.add_parser("benchmark", help="build a synthetic index and time queries")
+    bench.add_argument("--jobs", type=int, default=100000)
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        index = JobIndex(enabled=True)
+        for path in args.files:
+            print(f"📥 {path}: {index.upsert(iter_jobs(path))} jobs added or changed")
+        print(f"📊 {index.count()} jobs indexed")
+    elif args.command == "search":
+        index = JobIndex(enabled=True)
+        filters = {facet: getattr(args, facet) for facet in FACETS}
+        started = time.perf_counter()
+        results = index.search(args.query, limit=args.limit, **filters)
+        elapsed = time.perf_counter() - started
+        for job in results:
+            salary = f" 💰 {job['salary_min']:.0f}-{job['salary_max'] or job['salary_min']:.0f}" if job["salary_min"] else ""
+            print(f"- {job['title']} @ {job['company'] or '-'} ({job['location'] or '-'}, "
+                  f"{job['work_arrangement'] or '-'}){salary}")
+            if job["snippet"]:
+                print(f"  ↳ {' '.join(job['snippet'].split())}")
+            if job["url"]:
+                print(f"  🔗 {job['url']}")
+        print(f"\n🔎 {index.count(args.query, **filters)} matches, top {len(results)} in {elapsed * 1000:.1f} ms")
+        if args.facets:
+            for facet, values in index.facets(args.query, **filters).items():
+                if values:
+                    print(f"📊 {facet}: " + ", ".join(f"{value} ({n})" for value, n in values))
+    else:
+        seeds = ["processed_jobs/structured_jobs_20250415_232030.json", "indeed_structured_jobs.json",
+                 "results/cleaned_jobs.json"]
+        benchmark(args.jobs, [path for path in seeds if os.path.exists(path)])
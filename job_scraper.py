@@ -1,9 +1,12 @@
-import json
-import os
 import feedparser
 import asyncio
-import requests
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from feed_fetcher import fetch_feeds
+from seen_index import job_key, shared_index
+from jsonl_io import load_json, merge_by_key, write_json
+from near_dup_index import shared_near_dups
+from metrics import finish_run, metrics
+from location_matcher import filter_jobs
 from bs4 import BeautifulSoup
 
 # === RSS FEEDS ===
@@ -14,18 +17,22 @@ RSS_FEEDS = {
 }
 
 # === FILTER SETTINGS ===
-LOCATION_FILTER = "canada"
+LOCATION_FILTER = {"country": "CA"}
+
+# === OUTPUT ===
+OUTPUT_PATH = "results/fetched_jobs.json"
 
 # === RSS PARSER ===
-def parse_rss_feed(url, source):
+def parse_rss_feed(body, source):
     try:
-        feed = feedparser.parse(url)
         jobs = []
+        if body is None:
+            return jobs
+        feed = feedparser.parse(body)
 
         if source == "jobicy":
             # Parse raw XML to extract <job_listing:company>
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, "xml")
+            soup = BeautifulSoup(body, "xml")
             items = soup.find_all("item")
 
             for i, entry in enumerate(feed.entries):
@@ -65,46 +72,29 @@ def parse_rss_feed(url, source):
         print(f"❌ Error parsing feed for {source}: {e}")
         return []
 
-# === LOCATION FILTER ===
-def filter_jobs(jobs, keyword="canada"):
-    keyword = keyword.lower()
-    kept, discarded = [], []
-
-    for job in jobs:
-        text = json.dumps(job).lower()
-        if keyword in text:
-            kept.append(job)
-        else:
-            discarded.append(job)
-
-    return kept, discarded
-
 # === YCOMBINATOR RAW TEXT GRABBER ===
-async def grab_ycombinator_inner_text(url="https://www.ycombinator.com/jobs"):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(url, timeout=60000)
-        await page.wait_for_timeout(3000)
-        text = await page.evaluate("document.body.innerText")
-        await browser.close()
-    return text
+async def grab_ycombinator_inner_text(pool, url="https://www.ycombinator.com/jobs"):
+    return await pool.inner_text(url)
 
 # === MAIN ===
 async def main():
     all_jobs = []
     report = {}
+    index = shared_index()
+    near_dups = shared_near_dups()
 
-    # 1. Pull from RSS feeds
-    for source, url in RSS_FEEDS.items():
-        print(f"🌐 Fetching RSS: {source}")
-        raw_jobs = parse_rss_feed(url, source)
+    # 1. Pull from RSS feeds (all sources at once, conditional GETs)
+    print(f"🌐 Fetching {len(RSS_FEEDS)} RSS feeds")
+    bodies = await fetch_feeds(RSS_FEEDS)
+    for source in RSS_FEEDS:
+        with metrics.timer("feed_parse_seconds", source=source):
+            raw_jobs = parse_rss_feed(bodies[source], source)
 
         if source == "jobicy":
             kept = raw_jobs
             discarded = []
         else:
-            kept, discarded = filter_jobs(raw_jobs)
+            kept, discarded = filter_jobs(raw_jobs, **LOCATION_FILTER)
 
         report[source] = {
             "fetched": len(raw_jobs),
@@ -112,32 +102,46 @@ async def main():
             "discarded": len(discarded)
         }
 
-        all_jobs += kept
+        # Only postings that are new or changed since the last run move on;
+        # they are marked seen once the handoff file is written.
+        new_jobs = index.new_jobs("fetch", kept)
+        report[source]["new"] = len(new_jobs)
+        # Re-posts of a listing already taken from another feed are dropped here,
+        # so only one copy per cluster reaches the LLM stages.
+        unique_jobs = near_dups.filter_representatives(new_jobs)
+        report[source]["duplicates"] = len(new_jobs) - len(unique_jobs)
+        all_jobs += unique_jobs
+        for kind, count in report[source].items():
+            metrics.inc("items_total", count, stage="fetch", source=source, result=kind)
 
     # 2. Add raw YCombinator innerText
     print("🧠 Fetching raw innerText from YCombinator...")
-    yc_text = await grab_ycombinator_inner_text()
-    all_jobs.append({
+    async with BrowserPool(size=1) as pool:
+        yc_text = await grab_ycombinator_inner_text(pool)
+    yc_job = {
         "title": "Raw YCombinator Job Dump",
         "company": "YCombinator",
         "url": "https://www.ycombinator.com/jobs",
         "description": yc_text,
         "location": "N/A",
         "source": "ycombinator_raw"
-    })
-    report["ycombinator"] = {"fetched": 1, "kept": 1, "discarded": 0}
+    }
+    new_jobs = index.new_jobs("fetch", [yc_job])
+    all_jobs += new_jobs
+    report["ycombinator"] = {"fetched": 1, "kept": 1, "discarded": 0, "new": len(new_jobs), "duplicates": 0}
 
-    # 3. Save result
-    os.makedirs("results", exist_ok=True)
-    with open("results/fetched_jobs.json", "w", encoding="utf-8") as f:
-        json.dump(all_jobs, f, indent=2)
+    # 3. Save result, merged into the last run's so a batch the next stage
+    # has not read yet is kept; only then are the jobs marked seen.
+    write_json(OUTPUT_PATH, merge_by_key(load_json(OUTPUT_PATH, []), all_jobs, job_key))
+    index.mark_jobs("fetch", all_jobs)
 
     # 4. Summary
     print("\n📊 Job Source Report:")
     for source, stats in report.items():
-        print(f"- {source}: {stats['fetched']} fetched → {stats['kept']} kept, {stats['discarded']} discarded")
+        print(f"- {source}: {stats['fetched']} fetched → {stats['kept']} kept, {stats['discarded']} discarded, {stats['new']} new, {stats['duplicates']} duplicates")
 
-    print(f"\n💾 Final saved jobs: {len(all_jobs)} → results/fetched_jobs.json")
+    print(f"\n💾 Final saved jobs: {len(all_jobs)} → {OUTPUT_PATH}")
+    finish_run("fetch")
 
 if __name__ == "__main__":
     asyncio.run(main())
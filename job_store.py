@@ -0,0 +1,408 @@
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from jsonl_io import iter_jobs
+from rule_extractor import NOT_AVAILABLE
+from seen_index import content_hash
+
+# === STORE SETTINGS ===
+STORE_DIR = os.getenv("JOB_STORE_PATH", "processed_jobs/store")
+ENABLED = os.getenv("JOB_STORE", "on").lower() not in ("0", "off", "false", "no")
+COMPRESSION = "zstd"
+# Rows per append call before a partition file is flushed.
+WRITE_BATCH = 50000
+
+# Nested extractor fields are flattened; lists stay list<string> columns.
+SCHEMA = pa.schema([
+    ("job_id", pa.string()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("location", pa.string()),
+    ("url", pa.string()),
+    ("website", pa.string()),
+    ("salary_min", pa.float64()),
+    ("salary_max", pa.float64()),
+    ("salary_currency", pa.string()),
+    ("employment_type", pa.string()),
+    ("work_arrangement", pa.string()),
+    ("experience_years", pa.float64()),
+    ("experience_level", pa.string()),
+    ("skills_technical", pa.list_(pa.string())),
+    ("skills_soft", pa.list_(pa.string())),
+    ("responsibilities", pa.list_(pa.string())),
+    ("qualifications_required", pa.list_(pa.string())),
+    ("qualifications_preferred", pa.list_(pa.string())),
+    ("description", pa.string()),
+    ("extracted_at", pa.timestamp("us")),
+])
+# Partition values live in the directory names (date=.../source=...).
+PARTITION_SCHEMA = pa.schema([("date", pa.string()), ("source", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+DATASET_SCHEMA = pa.unify_schemas([SCHEMA, PARTITION_SCHEMA])
+
+
+# === FLATTENING ===
+def _text(value):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value if value and value != NOT_AVAILABLE else None
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _strings(value):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [s for s in (_text(v) for v in value) if s]
+
+
+def _timestamp(value):
+    # Extractors write ISO dates; feeds carry RFC 822 ones.
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(str(value))
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def source_name(job):
+    """Short partition name: glassdoor, wellfound, indeed, or the feed name."""
+    source = job.get("source")
+    if isinstance(source, dict):
+        host = urlsplit(source.get("website") or source.get("original_url") or "").netloc
+        labels = host.split(".")
+        name = labels[-2] if len(labels) >= 2 else host
+    else:
+        name = str(source or "unknown")
+    return re.sub(r"[^a-z0-9_-]+", "_", name.lower()) or "unknown"
+
+
+def flatten_job(job):
+    """(partition date, source, row) for one extractor or feed record."""
+    source = job.get("source") if isinstance(job.get("source"), dict) else {}
+    salary = job.get("salary_range") if isinstance(job.get("salary_range"), dict) else {}
+    skills = job.get("skills") if isinstance(job.get("skills"), dict) else {}
+    experience = job.get("experience") if isinstance(job.get("experience"), dict) else {}
+    quals = job.get("qualifications") if isinstance(job.get("qualifications"), dict) else {}
+    url = job.get("url") or source.get("original_url")
+    extracted_at = _timestamp(source.get("extraction_date") or job.get("published")) or datetime.now()
+
+    row = {
+        "title": _text(job.get("title")),
+        "company": _text(job.get("company")),
+        "location": _text(job.get("location")),
+        "url": url,
+        "website": source.get("website"),
+        "salary_min": _number(salary.get("min")),
+        "salary_max": _number(salary.get("max")),
+        "salary_currency": _text(salary.get("currency")),
+        "employment_type": _text(job.get("employment_type")),
+        "work_arrangement": _text(job.get("work_arrangement")),
+        "experience_years": _number(experience.get("years")),
+        "experience_level": _text(experience.get("level")),
+        "skills_technical": _strings(skills.get("technical")),
+        "skills_soft": _strings(skills.get("soft")),
+        "responsibilities": _strings(job.get("responsibilities")),
+        "qualifications_required": _strings(quals.get("required")),
+        "qualifications_preferred": _strings(quals.get("preferred")),
+        "description": _text(job.get("description")),
+        "extracted_at": extracted_at,
+    }
+    # Search-page crawls share one URL across many jobs, so identity is
+    # the posting itself, not just the link.
+    row["job_id"] = content_hash(f"{row['title']}|{row['company']}|{row['location']}|{url}")[:32]
+    return extracted_at.date().isoformat(), source_name(job), row
+
+
+# === STORE ===
+class JobStore:
+    """Parquet dataset of structured jobs, partitioned by date and source.
+
+    Each append writes one new file per partition it touches; compact()
+    merges a partition's files into one and drops repeated job_ids. Queries
+    only read the columns and partitions they need.
+    """
+
+    def __init__(self, root=STORE_DIR, enabled=ENABLED):
+        self.root = root
+        self.enabled = enabled
+
+    def _new_part(self, day, source):
+        directory = os.path.join(self.root, f"date={day}", f"source={source}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"part-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+
+    def _write(self, day, source, rows):
+        path = self._new_part(day, source)
+        pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), path, compression=COMPRESSION)
+        return path
+
+    def append(self, jobs):
+        """Add jobs (dicts as the extractors write them); returns how many."""
+        if not self.enabled:
+            return 0
+        partitions, count = {}, 0
+        for job in jobs:
+            day, source, row = flatten_job(job)
+            rows = partitions.setdefault((day, source), [])
+            rows.append(row)
+            count += 1
+            if len(rows) >= WRITE_BATCH:
+                self._write(day, source, rows)
+                partitions[(day, source)] = []
+        for (day, source), rows in partitions.items():
+            if rows:
+                self._write(day, source, rows)
+        return count
+
+    def partitions(self):
+        """{(date, source): [parquet files]} for everything on disk."""
+        found = {}
+        for path in glob.glob(os.path.join(self.root, "date=*", "source=*", "*.parquet")):
+            source_dir = os.path.dirname(path)
+            day = os.path.basename(os.path.dirname(source_dir)).split("=", 1)[1]
+            source = os.path.basename(source_dir).split("=", 1)[1]
+            found.setdefault((day, source), []).append(path)
+        return found
+
+    def compact(self, min_files=2):
+        """Merge each partition with at least `min_files` files into one.
+
+        Rows repeated across appends (same job_id) keep their newest copy.
+        Returns {"partitions": n, "files_before": n, "rows_before": n, "rows_after": n}.
+        """
+        summary = {"partitions": 0, "files_before": 0, "rows_before": 0, "rows_after": 0}
+        for (day, source), files in sorted(self.partitions().items()):
+            if len(files) < min_files:
+                continue
+            table = pa.concat_tables(pq.read_table(path, schema=SCHEMA) for path in files)
+            order = pc.sort_indices(table, sort_keys=[("extracted_at", "descending")])
+            seen, keep = set(), []
+            for index, job_id in zip(order.to_pylist(), table.column("job_id").take(order).to_pylist()):
+                if job_id not in seen:
+                    seen.add(job_id)
+                    keep.append(index)
+            merged = table.take(pa.array(sorted(keep), type=pa.int64()))
+
+            # Write the merged file first so a crash never loses rows; at
+            # worst the old parts linger and are merged again next time.
+            path = self._new_part(day, source)
+            pq.write_table(merged, path + ".tmp", compression=COMPRESSION)
+            os.replace(path + ".tmp", path)
+            for path in files:
+                os.remove(path)
+            summary["partitions"] += 1
+            summary["files_before"] += len(files)
+            summary["rows_before"] += table.num_rows
+            summary["rows_after"] += merged.num_rows
+        return summary
+
+    def dataset(self):
+        return ds.dataset(self.root, schema=DATASET_SCHEMA, format="parquet", partitioning=PARTITIONING)
+
+    def query(self, columns=None, salary_min=None, work_arrangement=None, skill=None,
+              source=None, since=None, until=None):
+        """Matching jobs as a pyarrow Table holding only `columns`.
+
+        salary_min keeps jobs whose posted minimum is at least that much;
+        skill is a case-insensitive substring of any technical skill;
+        since/until are ISO dates and prune whole partitions.
+        """
+        columns = list(columns or ["date", "source", "title", "company", "location",
+                                   "salary_min", "salary_max", "work_arrangement"])
+        result_schema = pa.schema([DATASET_SCHEMA.field(name) for name in columns])
+        if not os.path.isdir(self.root):
+            return result_schema.empty_table()
+
+        filters = []
+        if salary_min is not None:
+            filters.append(ds.field("salary_min") >= float(salary_min))
+        if work_arrangement:
+            values = [work_arrangement] if isinstance(work_arrangement, str) else list(work_arrangement)
+            filters.append(ds.field("work_arrangement").isin(values))
+        if source:
+            filters.append(ds.field("source") == source)
+        if since:
+            filters.append(ds.field("date") >= str(since))
+        if until:
+            filters.append(ds.field("date") <= str(until))
+        expression = None
+        for condition in filters:
+            expression = condition if expression is None else expression & condition
+
+        needed = columns + (["skills_technical"] if skill and "skills_technical" not in columns else [])
+        scanner = self.dataset().scanner(columns=needed, filter=expression)
+        batches = []
+        for batch in scanner.to_batches():
+            if skill and batch.num_rows:
+                skills = batch.column("skills_technical")
+                hits = pc.match_substring(pc.list_flatten(skills), skill, ignore_case=True)
+                matched = pc.unique(pc.filter(pc.list_parent_indices(skills), hits))
+                batch = batch.filter(pc.is_in(pa.array(range(batch.num_rows), type=matched.type), value_set=matched))
+            if batch.num_rows:
+                batches.append(batch.select(columns))
+        return pa.Table.from_batches(batches, schema=result_schema)
+
+    def stats(self):
+        partitions = self.partitions()
+        files = [path for paths in partitions.values() for path in paths]
+        return {
+            "partitions": len(partitions),
+            "files": len(files),
+            "rows": sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+            "bytes": sum(os.path.getsize(path) for path in files),
+        }
+
+
+_shared_store = None
+
+
+def shared_store():
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = JobStore()
+    return _shared_store
+
+
+# === BENCHMARK ===
+def benchmark(total, days, seed_files, runs_per_day=2):
+    jobs = [job for path in seed_files for job in iter_jobs(path)]
+    sources = ["glassdoor", "wellfound", "indeed"]
+    start = date.today() - timedelta(days=days)
+    per_run = max(1, total // (days * runs_per_day))
+
+    def synthetic():
+        # Runs in date order, like a scheduler producing one batch per run.
+        rng = random.Random(7)
+        for i in range(days * runs_per_day * per_run):
+            job = dict(rng.choice(jobs))
+            day = start + timedelta(days=i // (runs_per_day * per_run))
+            job["title"] = f"{job.get('title')} #{i}"
+            job["source"] = {"website": f"https://www.{rng.choice(sources)}.ca/jobs",
+                             "original_url": f"https://example.com/job/{i}",
+                             "extraction_date": f"{day.isoformat()}T12:00:00"}
+            yield job
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = JobStore(os.path.join(workdir, "store"), enabled=True)
+        started = time.perf_counter()
+        run = []
+        for job in synthetic():
+            run.append(job)
+            if len(run) == per_run:
+                store.append(run)
+                run = []
+        appended = time.perf_counter() - started
+        before = store.stats()
+
+        started = time.perf_counter()
+        store.compact()
+        compacted = time.perf_counter() - started
+        after = store.stats()
+
+        json_path = os.path.join(workdir, "jobs.jsonl")
+        with open(json_path, "w", encoding="utf-8") as f:
+            for job in synthetic():
+                f.write(json.dumps(job) + "\n")
+
+        started = time.perf_counter()
+        table = store.query(columns=["title", "company", "salary_min"], salary_min=100000,
+                            work_arrangement=["Remote", "Hybrid"], skill="python")
+        query_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        since = (date.today() - timedelta(days=7)).isoformat()
+        recent = store.query(columns=["title"], since=since)
+        recent_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matches = [job for job in iter_jobs(json_path)
+                   if (_number((job.get("salary_range") or {}).get("min")) or 0) >= 100000
+                   and job.get("work_arrangement") in ("Remote", "Hybrid")
+                   and any("python" in s.lower() for s in _strings((job.get("skills") or {}).get("technical")))]
+        json_s = time.perf_counter() - started
+
+        print(f"📦 {before['rows']} jobs over {days} days: append {appended:.1f}s "
+              f"({before['files']} files) → compact {compacted:.1f}s ({after['files']} files)")
+        print(f"💾 Parquet {after['bytes'] / 1e6:.1f} MB vs JSONL {os.path.getsize(json_path) / 1e6:.1f} MB")
+        print(f"🔎 salary ≥100k, Remote/Hybrid, python: {table.num_rows} rows in {query_s * 1000:.0f} ms "
+              f"(JSONL scan {json_s * 1000:.0f} ms, {len(matches)} rows)")
+        print(f"🗓️  last 7 days, titles only: {recent.num_rows} rows in {recent_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar store for structured jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="append JSON/JSONL job files to the store")
+    load.add_argument("files", nargs="+")
+
+    commands.add_parser("compact", help="merge each partition's files into one")
+
+    query = commands.add_parser("query", help="filter jobs, reading only the needed columns")
+    query.add_argument("--columns", nargs="+")
+    query.add_argument("--salary-min", type=float)
+    query.add_argument("--arrangement", nargs="+", help="e.g. Remote Hybrid")
+    query.add_argument("--skill", help="substring of a technical skill, e.g. python")
+    query.add_argument("--source", help="glassdoor, wellfound, indeed or a feed name")
+    query.add_argument("--since", help="YYYY-MM-DD")
+    query.add_argument("--until", help="YYYY-MM-DD")
+    query.add_argument("--limit", type=int, default=20)
+
+    bench = commands.add_parser("benchmark", help="time append/compact/query on synthetic months of runs")
+    bench.add_argument("--jobs", type=int, default=200000)
+    bench.add_argument("--days", type=int, default=90)
+
+    args = parser.parse_args()
+    store = JobStore(enabled=True)
+
+    if args.command == "import":
+        for path in args.files:
+            print(f"📥 {path}: {store.append(iter_jobs(path))} jobs")
+        print("📊 Store:", store.stats())
+    elif args.command == "compact":
+        summary = store.compact()
+        print(f"🧹 Compacted {summary['partitions']} partitions: {summary['files_before']} files, "
+              f"{summary['rows_before']} → {summary['rows_after']} rows")
+        print("📊 Store:", store.stats())
+    elif args.command == "query":
+        started = time.perf_counter()
+        table = store.query(args.columns, args.salary_min, args.arrangement, args.skill,
+                            args.source, args.since, args.until)
+        elapsed = time.perf_counter() - started
+        for row in table.slice(0, args.limit).to_pylist():
+            print(" | ".join("-" if value is None else str(value) for value in row.values()))
+        print(f"\n🔎 {table.num_rows} jobs in {elapsed * 1000:.0f} ms")
+    else:
+        seeds = sorted(glob.glob("processed_jobs/structured_jobs_*.json")) + ["indeed_structured_jobs.json"]
+        benchmark(args.jobs, args.days, [path for path in seeds if os.path.exists(path)])
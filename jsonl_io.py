@@ -0,0 +1,77 @@
+import glob
+import json
+import os
+
+
+def append_jsonl(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_jobs(path):
+    """Yield job records from either a JSONL stream or a legacy JSON array."""
+    if path.endswith(".jsonl"):
+        yield from iter_jsonl(path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+def merge_by_key(old, new, key):
+    """Records of old with new added; a new record replaces an old one with the same key."""
+    merged = {key(record): record for record in old}
+    merged.update((key(record), record) for record in new)
+    return list(merged.values())
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    # Written to a temporary file first, so a crash never leaves the
+    # handoff file half-written.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def latest_file(pattern):
+    matches = glob.glob(pattern)
+    return max(matches, key=os.path.getmtime) if matches else None
+
+
+class Checkpoint:
+    """Append-only record of completed work units, e.g. (website, page, chunk)."""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._done = set()
+        if resume and os.path.exists(path):
+            for key in iter_jsonl(path):
+                self._done.add(tuple(key))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def done(self, key):
+        return tuple(key) in self._done
+
+    def mark(self, key):
+        self._done.add(tuple(key))
+        append_jsonl(self.path, list(key))
+
+    def __len__(self):
+        return len(self._done)
@@ -0,0 +1,315 @@
+import argparse
+import re
+import time
+
+# === SEGMENTER SETTINGS ===
+MIN_SECTION_CHARS = 100
+GLASSDOOR_JOB_LINK = "](https://www.glassdoor.ca/job-listing/"
+GLASSDOOR_HINTS = ("per hour", "glassdoor est.", "**skills:**")
+WELLFOUND_JOB_LINK = "](https://wellfound.com/jobs/"
+WELLFOUND_COMPANY_LINK = "**](https://wellfound.com/company/"
+WELLFOUND_STOPS = ("[", "Save", "Apply")
+WELLFOUND_KEYWORDS = ("Remote", "salary", "Full-time")
+
+# Site plugins: name -> function(markdown) returning listing chunks.
+PLUGINS = {}
+
+
+def site_plugin(name):
+    def register(split):
+        PLUGINS[name] = split
+        return split
+    return register
+
+
+def pick_plugin(website_key):
+    """The splitter for a crawled site, or None if no plugin knows it."""
+    key = website_key.lower()
+    for name, split in PLUGINS.items():
+        if name in key:
+            return split
+    return None
+
+
+def segment(website_key, markdown):
+    split = pick_plugin(website_key)
+    return split(markdown) if split and markdown else []
+
+
+# === SCANNING HELPERS ===
+# Every helper moves strictly forward through the text with str.find, so
+# each plugin is one linear pass however large the page is.
+def _skip_space(text, pos):
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _line_end(text, pos):
+    end = text.find("\n", pos)
+    return len(text) if end == -1 else end
+
+
+# === GLASSDOOR ===
+def _glassdoor_separators(markdown):
+    """Spans of `- ![... Logo](...)` company-logo lines between listings."""
+    pos = 0
+    while True:
+        bang = markdown.find("![", pos)
+        if bang == -1:
+            return
+        dash = bang
+        while dash > pos and markdown[dash - 1].isspace():
+            dash -= 1
+        line_end = _line_end(markdown, bang)
+        logo = markdown.find("Logo](", bang + 2, line_end)
+        close = markdown.find(")", logo + 6, line_end) if logo != -1 else -1
+        if dash > pos and markdown[dash - 1] == "-" and close != -1:
+            yield dash - 1, close + 1
+            pos = close + 1
+        else:
+            pos = bang + 2
+
+
+def _has_glassdoor_link(section):
+    # A [title](https://www.glassdoor.ca/job-listing/...) link on one line.
+    pos = 0
+    while True:
+        link = section.find(GLASSDOOR_JOB_LINK, pos)
+        if link == -1:
+            return False
+        line_start = section.rfind("\n", 0, link) + 1
+        if (section.find("[", line_start, link) != -1
+                and section.find(")", link + len(GLASSDOOR_JOB_LINK), _line_end(section, link)) != -1):
+            return True
+        pos = link + 1
+
+
+@site_plugin("glassdoor")
+def split_glassdoor(markdown):
+    chunks, start = [], 0
+    for sep_start, sep_end in list(_glassdoor_separators(markdown)) + [(len(markdown), len(markdown))]:
+        section = markdown[start:sep_start]
+        start = sep_end
+        if len(section.strip()) < MIN_SECTION_CHARS:
+            continue
+        lowered = section.lower()
+        if any(hint in lowered for hint in GLASSDOOR_HINTS) and _has_glassdoor_link(section):
+            chunks.append(section.strip())
+    return chunks
+
+
+# === WELLFOUND ===
+def _wellfound_titles(section):
+    """(title, start) for each [title](https://wellfound.com/jobs/<id>-...) link.
+
+    Like the old regex, a title runs from the first `[` on its line after
+    the previous match to the job link, and never crosses a newline.
+    """
+    pos = scan = 0
+    while True:
+        link = section.find(WELLFOUND_JOB_LINK, scan)
+        if link == -1:
+            return
+        after = link + len(WELLFOUND_JOB_LINK)
+        digits = after
+        while digits < len(section) and section[digits].isdigit():
+            digits += 1
+        scan = link + 1
+        if digits == after or digits >= len(section) or section[digits] != "-":
+            continue
+        open_bracket = section.find("[", max(pos, section.rfind("\n", 0, link) + 1), link)
+        if open_bracket != -1:
+            yield section[open_bracket + 1:link], open_bracket
+            pos = scan = digits + 1
+
+
+def _wellfound_company(section):
+    """Name from the section's `[**Company**](https://wellfound.com/company/...)` header."""
+    link = section.find(WELLFOUND_COMPANY_LINK)
+    start = section.rfind("[**", 0, link) if link != -1 else -1
+    return section[start + 3:link].strip() if start != -1 else None
+
+
+@site_plugin("wellfound")
+def split_wellfound(markdown, company=True):
+    """Job cards of each company section.
+
+    A card only holds title, salary and location; the company is named once
+    in the section header, so it is appended as a `Company:` line unless
+    company=False (the old regex's output).
+    """
+    chunks = []
+    for section in markdown.split("[![")[1:]:
+        titles = list(_wellfound_titles(section))
+        name = _wellfound_company(section) if company else None
+        # Next position of each stop token; cards come in order, so these
+        # only move forward and the section is scanned once per token.
+        stops = dict.fromkeys(WELLFOUND_STOPS, -1)
+        end = len(section) - 1 if section.endswith("\n") else len(section)
+        for title, start in titles:
+            # The card text runs from the title to the next link, Save or Apply.
+            after = start + len(title) + 2
+            for token, found in stops.items():
+                if found < after:
+                    found = section.find(token, after)
+                    stops[token] = len(section) if found == -1 else found
+            stop = min(end, *stops.values())
+            chunk = f"[{title}]{section[start:stop]}"
+            chunks.append(f"{chunk.rstrip()}\n\nCompany: {name}" if name else chunk)
+        if not titles and any(keyword in section for keyword in WELLFOUND_KEYWORDS):
+            chunks.append(section)
+    return chunks
+
+
+# === INDEED ===
+def _table_cell_close(markdown, pos):
+    """(start, end) of the next `|<spaces>|` cell boundary at or after pos."""
+    while True:
+        bar = markdown.find("|", pos)
+        if bar == -1:
+            return None
+        after = _skip_space(markdown, bar + 1)
+        if after < len(markdown) and markdown[after] == "|":
+            return bar, after + 1
+        pos = after
+
+
+@site_plugin("indeed")
+def split_indeed(markdown):
+    """Table rows of the form `| ## [Job Title](url) ... | |`."""
+    chunks, pos = [], 0
+    while True:
+        bar = markdown.find("|", pos)
+        if bar == -1:
+            return chunks
+        heading = _skip_space(markdown, bar + 1)
+        if not markdown.startswith("##", heading):
+            pos = bar + 1
+            continue
+        title_start = _skip_space(markdown, heading + 2)
+        if not markdown.startswith("[", title_start):
+            pos = bar + 1
+            continue
+        title_end = markdown.find("]", title_start + 1)
+        if title_end == -1:
+            return chunks
+        close = _table_cell_close(markdown, title_end + 1)
+        if close is None:
+            # No later row can close either.
+            return chunks
+        chunks.append(f"## [{markdown[title_start + 1:title_end]}]{markdown[title_end + 1:close[0]]}")
+        pos = close[1]
+
+
+# === BENCHMARK ===
+# The regexes the plugins replaced, kept as the baseline they must match.
+def regex_glassdoor(markdown):
+    chunks = []
+    for section in re.split(r'-\s*!\[.*?Logo\]\(.*?\)', markdown):
+        if len(section.strip()) < MIN_SECTION_CHARS:
+            continue
+        if re.search(r'\[.*?\]\(https://www\.glassdoor\.ca/job-listing/.*?\)', section) and (
+                "per hour" in section.lower() or "glassdoor est." in section.lower()
+                or "**skills:**" in section.lower()):
+            chunks.append(section.strip())
+    return chunks
+
+
+def regex_wellfound(markdown):
+    chunks = []
+    for section in markdown.split('[![')[1:]:
+        titles = re.findall(r'\[(.*?)\]\(https://wellfound\.com/jobs/\d+-', section)
+        for title in titles:
+            job_content = re.search(rf'{re.escape(f"[{title}]")}.*?(?=\[|Save|Apply|$)', section, re.DOTALL)
+            if job_content:
+                chunks.append(f"[{title}]{job_content.group(0)}")
+        if not titles and any(keyword in section for keyword in WELLFOUND_KEYWORDS):
+            chunks.append(section)
+    return chunks
+
+
+def regex_indeed(markdown):
+    return [f"## [{title}]{content}"
+            for title, content in re.findall(r'\|\s*##\s*\[(.*?)\](.*?)\|\s*\|', markdown, re.DOTALL)]
+
+
+BASELINES = {"glassdoor": regex_glassdoor, "wellfound": regex_wellfound, "indeed": regex_indeed}
+# What each plugin returns with its additions turned off, to compare with the baseline.
+PLAIN = {"wellfound": lambda markdown: split_wellfound(markdown, company=False)}
+
+
+def _differing(chunks, baseline):
+    """Listings that differ from the baseline's.
+
+    The Wellfound regex looks each title up from the start of its section,
+    so a second card with the same title repeats the first card's text.
+    The plugin keeps each card's own text; those cards are not counted.
+    """
+    if len(chunks) != len(baseline):
+        return abs(len(chunks) - len(baseline)) or 1
+    seen = set()
+    differ = 0
+    for chunk, expected in zip(chunks, baseline):
+        title = expected[:expected.find("]") + 1]
+        if chunk != expected and title not in seen:
+            differ += 1
+        seen.add(title)
+    return differ
+
+
+def _timed(split, markdown):
+    started = time.perf_counter()
+    chunks = split(markdown)
+    return chunks, time.perf_counter() - started
+
+
+def benchmark(path, megabytes):
+    from crawl_reader import iter_crawl_pages
+
+    pages = {}
+    for website, status, _, markdown in iter_crawl_pages(path):
+        name = next((n for n in PLUGINS if n in website.lower()), None)
+        if name and markdown and status == "completed":
+            pages.setdefault(name, []).append(markdown)
+
+    print("🔎 Recorded pages (plugin vs regex):")
+    for name, markdowns in pages.items():
+        differ = sum(_differing(PLAIN.get(name, PLUGINS[name])(md), BASELINES[name](md)) for md in markdowns)
+        print(f"  {name:<10} {len(markdowns)} pages, {sum(len(PLUGINS[name](md)) for md in markdowns)} listings, "
+              f"{f'❌ {differ} differ' if differ else 'identical'}")
+
+    print(f"\n⏱️  ~{megabytes} MB pages:")
+    for name, markdowns in pages.items():
+        joined = "\n".join(markdowns)
+        big = joined * max(1, int(megabytes * 1024 * 1024 / len(joined)))
+        chunks, plugin_s = _timed(PLAIN.get(name, PLUGINS[name]), big)
+        baseline, regex_s = _timed(BASELINES[name], big)
+        print(f"  {name:<10} {len(big) / 1e6:5.1f} MB  plugin {plugin_s * 1000:8.1f} ms  regex {regex_s * 1000:9.1f} ms  "
+              f"({len(chunks)} listings{f', ❌ {differ} differ' if (differ := _differing(chunks, baseline)) else ''})")
+
+    # One company section holding every card: each card must not rescan the
+    # section from its start.
+    print("\n⚠️  Wellfound section with many cards:")
+    card = "[Data Scientist {}](https://wellfound.com/jobs/{}-data-scientist)\n$120k – $150k • Toronto\nSave\n"
+    for cards in (1000, 4000, 8000):
+        section = "[![Logo](x)\n" + "".join(card.format(i, i) for i in range(cards))
+        _, plugin_s = _timed(split_wellfound, section)
+        print(f"  {len(section) / 1e3:6.0f} KB  plugin {plugin_s * 1000:8.2f} ms")
+
+    # A table row whose closing `| |` never comes makes the DOTALL regex
+    # retry every later start to the end of the page.
+    print("\n⚠️  Indeed page with unterminated rows:")
+    for rows in (50, 100, 200):
+        broken = "| ## [Data Scientist](https://ca.indeed.com/viewjob?jk=1)\nToronto, ON\n" * rows
+        _, plugin_s = _timed(split_indeed, broken)
+        _, regex_s = _timed(regex_indeed, broken)
+        print(f"  {len(broken) / 1e3:6.0f} KB  plugin {plugin_s * 1000:8.2f} ms  regex {regex_s * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the site plugins against the old regexes and time both")
+    parser.add_argument("--crawl", default="job_listings_20250415_171223.json", help="recorded Firecrawl dump")
+    parser.add_argument("--megabytes", type=float, default=4.0, help="size of the synthetic pages")
+    args = parser.parse_args()
+    benchmark(args.crawl, args.megabytes)
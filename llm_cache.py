@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# === CACHE SETTINGS ===
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite")
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+# Eviction trims the store to this share of max_bytes, so the scan it needs
+# runs once per many writes rather than on every put past the cap.
+EVICT_TO = 0.9
+
+
+def cache_key(model, system_prompt, prompt, params=None):
+    payload = json.dumps(
+        [model, system_prompt or "", prompt, params or {}],
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Persistent content-addressed string store with LRU eviction.
+
+    Holds LLM responses by default; entries may carry a TTL (None never
+    expires). The byte total is read once and kept up to date on every
+    write, so a put under the cap never rescans the table.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, enabled=ENABLED, ttl=None):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(responses)")]
+            if "expires_at" not in columns:
+                # Stores created before TTLs existed.
+                self._conn.execute("ALTER TABLE responses ADD COLUMN expires_at REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used)")
+            self._conn.commit()
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _remove(self, key):
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bytes -= row[0]
+
+    def lookup(self, key):
+        """(value, expires_at) for a live entry, or None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._remove(key)
+                self._conn.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0], row[1]
+
+    def get(self, key):
+        entry = self.lookup(key)
+        return entry[0] if entry else None
+
+    def put(self, key, value, ttl=None):
+        if not self.enabled or value is None:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remove(key)
+            self._conn.execute(
+                "INSERT INTO responses (key, value, size, last_used, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now + ttl if ttl is not None else None)
+            )
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._remove(key)
+            self._conn.commit()
+
+    def purge_expired(self):
+        if not self.enabled:
+            return 0
+        now = time.time()
+        with self._lock:
+            removed, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at <= ?", (now,)
+            ).fetchone()
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            self._bytes -= size
+            self.expired += removed
+        return removed
+
+    def _evict(self, now):
+        # Another process may share the file, so the total is re-read before
+        # deciding what to drop.
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self._bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TO
+        # Expired rows go first, then the least recently used.
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY COALESCE(expires_at > ?, 1), last_used", (now,)
+        )
+        evicted = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            evicted.append(key)
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in evicted])
+        self.evicted += len(evicted)
+        logging.info(f"🧹 Evicted {len(evicted)} cache entries")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self.enabled else 0
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired, "evicted": self.evicted,
+                "entries": entries, "bytes": self._bytes, "enabled": self.enabled}
+
+
+_shared_cache = None
+
+
+def shared_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = LLMCache()
+    return _shared_cache
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+
+import openai
+
+from llm_cache import cache_key, shared_cache
+from metrics import metrics
+from rate_limiter import RateLimiter
+
+# === ENGINE SETTINGS (free OpenRouter tier by default) ===
+# LLM_BASE_URL points every client at another OpenAI-compatible server,
+# e.g. fake_llm_server.py for offline benchmarks.
+BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+REQUESTS_PER_MIN = int(os.getenv("LLM_REQUESTS_PER_MIN", "20"))
+TOKENS_PER_MIN = int(os.getenv("LLM_TOKENS_PER_MIN", "0")) or None
+COMPLETION_TOKENS_ESTIMATE = 600
+
+_shared_limiter = None
+
+
+def shared_limiter():
+    # One limiter per process so every extractor draws from the same quota.
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter(REQUESTS_PER_MIN, TOKENS_PER_MIN)
+    return _shared_limiter
+
+
+def estimate_tokens(*texts):
+    return sum(len(t) for t in texts) // 4
+
+
+def parse_json_content(content):
+    content = content.strip()
+    if "```" in content:
+        match = re.search(r'```(?:json)?(.*?)```', content, re.DOTALL)
+        if match:
+            content = match.group(1).strip()
+    return json.loads(content)
+
+
+class LLMEngine:
+    def __init__(self, client, model, system_prompt, max_in_flight=MAX_IN_FLIGHT,
+                 limiter=None, max_retries=3, cache=None):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.limiter = limiter or shared_limiter()
+        self.max_retries = max_retries
+        self.cache = cache or shared_cache()
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def complete(self, prompt):
+        key = cache_key(self.model, self.system_prompt, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.inc("llm_cache_hits_total", model=self.model)
+            return cached
+        metrics.inc("llm_cache_misses_total", model=self.model)
+
+        estimated = estimate_tokens(self.system_prompt, prompt) + COMPLETION_TOKENS_ESTIMATE
+
+        async def request():
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            return response.choices[0].message.content, getattr(response, "usage", None)
+
+        async with self._slots:
+            content = await self.call(request, estimated)
+        if content is not None:
+            self.cache.put(key, content)
+        return content
+
+    async def call(self, request, estimated):
+        """Run `request()` under the shared limiter, retrying errors and 429s.
+
+        `request` is an async callable returning (result, usage); streamed
+        calls pass one that reads the whole stream. Returns the result, or
+        None once every attempt failed.
+        """
+        for attempt in range(self.max_retries):
+            waited = time.perf_counter()
+            await self.limiter.acquire(estimated)
+            started = time.perf_counter()
+            metrics.observe("llm_limiter_wait_seconds", started - waited, model=self.model)
+            try:
+                result, usage = await request()
+                metrics.observe("llm_request_seconds", time.perf_counter() - started, model=self.model)
+                self.limiter.reconcile(estimated, getattr(usage, "total_tokens", None))
+                metrics.inc("llm_prompt_tokens_total", getattr(usage, "prompt_tokens", None) or 0, model=self.model)
+                metrics.inc("llm_completion_tokens_total", getattr(usage, "completion_tokens", None) or 0, model=self.model)
+                return result
+            except openai.RateLimitError as e:
+                metrics.inc("llm_retries_total", model=self.model, reason="rate_limit")
+                retry_after = e.response.headers.get("retry-after") if e.response else None
+                delay = float(retry_after) if retry_after else 2 ** (attempt + 2)
+                logging.warning(f"Attempt {attempt+1}/{self.max_retries}: rate limited, pausing {delay:.1f}s")
+                self.limiter.pause(delay)
+            except Exception as e:
+                metrics.inc("llm_retries_total", model=self.model, reason="error")
+                logging.warning(f"Attempt {attempt+1}/{self.max_retries}: Error: {e}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+        metrics.inc("llm_failures_total", model=self.model)
+        logging.error("Failed to process job after multiple attempts")
+        return None
+
+    async def complete_json(self, prompt):
+        for attempt in range(self.max_retries):
+            content = await self.complete(prompt)
+            if content is None:
+                return None
+            try:
+                return parse_json_content(content)
+            except json.JSONDecodeError as e:
+                # Never keep serving a response that failed to parse.
+                metrics.inc("llm_invalid_json_total", model=self.model)
+                self.cache.delete(cache_key(self.model, self.system_prompt, prompt))
+                logging.warning(f"Attempt {attempt+1}/{self.max_retries}: Invalid JSON: {e}")
+        return None
+
+
+async def run_bounded(items, handler, concurrency=MAX_IN_FLIGHT):
+    """Feed `items` to `handler` from a fixed set of workers.
+
+    Items are pulled lazily through a small queue, so memory stays flat no
+    matter how many work units the iterable yields.
+    """
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await handler(item)
+            except Exception as e:
+                # One bad item must not take its worker down and stall the queue.
+                logging.error(f"❌ Work item failed: {e}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for item in items:
+        await queue.put(item)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
@@ -0,0 +1,244 @@
+import re
+import time
+import random
+
+# === GAZETTEER ===
+# phrase (lowercase) -> normalized tags it implies
+COUNTRIES = {
+    "canada": "CA", "canadian": "CA",
+    "united states": "US", "usa": "US", "united states of america": "US",
+    "united kingdom": "GB", "uk": "GB", "england": "GB",
+    "germany": "DE", "france": "FR", "india": "IN", "mexico": "MX",
+    "brazil": "BR", "australia": "AU", "ireland": "IE", "netherlands": "NL",
+    "spain": "ES", "poland": "PL", "philippines": "PH",
+    "belgium": "BE", "italy": "IT", "portugal": "PT", "sweden": "SE",
+    "switzerland": "CH", "austria": "AT", "denmark": "DK", "norway": "NO",
+    "finland": "FI", "slovakia": "SK", "czech republic": "CZ", "romania": "RO",
+    "ukraine": "UA", "israel": "IL", "japan": "JP", "south korea": "KR",
+    "korea": "KR", "china": "CN", "singapore": "SG", "new zealand": "NZ",
+    "south africa": "ZA", "nigeria": "NG", "kenya": "KE", "pakistan": "PK",
+    "peru": "PE", "chile": "CL", "colombia": "CO", "argentina": "AR",
+}
+
+PROVINCES = {
+    "ON": "ontario", "BC": "british columbia", "AB": "alberta", "QC": "quebec",
+    "MB": "manitoba", "SK": "saskatchewan", "NS": "nova scotia",
+    "NB": "new brunswick", "NL": "newfoundland and labrador",
+    "PE": "prince edward island", "YT": "yukon", "NT": "northwest territories",
+    "NU": "nunavut",
+}
+# Province codes that are also ISO country codes (Netherlands, Peru,
+# Slovakia): "Amsterdam, NL" is not Newfoundland, so these only count right
+# after a Canadian city.
+AMBIGUOUS_CODES = {"NL", "PE", "SK"}
+
+# "Vancouver, WA" is not in BC. CA is left out: "Toronto, CA" usually
+# means Canada, not California.
+US_STATES = (
+    "AL AK AZ AR CO CT DE FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH NJ NM NY NC ND "
+    "OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY DC"
+).split()
+
+CITIES = {
+    "toronto": "ON", "ottawa": "ON", "mississauga": "ON", "brampton": "ON",
+    "waterloo": "ON", "kitchener": "ON", "markham": "ON", "oakville": "ON",
+    "peterborough": "ON", "vaughan": "ON", "montreal": "QC", "montréal": "QC",
+    "quebec city": "QC", "vancouver": "BC", "burnaby": "BC", "surrey": "BC",
+    "calgary": "AB", "edmonton": "AB", "winnipeg": "MB", "regina": "SK",
+    "saskatoon": "SK", "halifax": "NS", "fredericton": "NB", "moncton": "NB",
+    "st. john's": "NL", "charlottetown": "PE", "whitehorse": "YT",
+    "yellowknife": "NT", "iqaluit": "NU",
+}
+
+REGIONS = {
+    "north america": ["region:north-america"],
+    "americas": ["region:americas"],
+    "emea": ["region:emea"],
+    "europe": ["region:europe"],
+    "latam": ["region:latam"],
+    "apac": ["region:apac"],
+    "worldwide": ["worldwide"],
+    "anywhere in the world": ["worldwide"],
+    "work from anywhere": ["worldwide", "remote"],
+    "remote": ["remote"],
+    "work from home": ["remote"],
+    "wfh": ["remote"],
+    "telecommute": ["remote"],
+    "hybrid": ["hybrid"],
+}
+
+# Fields scanned first; the description is only read when these carry no
+# geographic tag (feeds like Jobicy leave "location" empty).
+PRIMARY_FIELDS = ("location", "title")
+FALLBACK_FIELDS = ("description",)
+
+
+def _gazetteer():
+    phrases = {}
+    for phrase, code in COUNTRIES.items():
+        phrases.setdefault(phrase, set()).add(f"country:{code}")
+    for code, name in PROVINCES.items():
+        phrases.setdefault(name, set()).update({f"province:{code}", "country:CA"})
+    for city, province in CITIES.items():
+        phrases.setdefault(city, set()).update({f"city:{city}", f"province:{province}", "country:CA"})
+    for phrase, tags in REGIONS.items():
+        phrases.setdefault(phrase, set()).update(tags)
+    return phrases
+
+
+def _foreign(tags):
+    return any(tag.startswith("country:") and tag != "country:CA" for tag in tags)
+
+
+def _trie_pattern(phrases):
+    """Compile phrases into a prefix-shared regex.
+
+    Shared prefixes become a single branch, so the regex engine walks the
+    text once like a multi-pattern automaton instead of trying every phrase
+    at every offset.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class LocationMatcher:
+    """Turns job records into normalized location tags in one pass."""
+
+    def __init__(self, primary_fields=PRIMARY_FIELDS, fallback_fields=FALLBACK_FIELDS):
+        self.primary_fields = primary_fields
+        self.fallback_fields = fallback_fields
+        self.phrases = _gazetteer()
+        # Anchoring on a separator character lets the regex engine skip
+        # ahead to the next word start instead of trying every offset.
+        self.pattern = re.compile(
+            r"[\s,;:/()<>|\"'.\-\[\]](" + _trie_pattern(self.phrases) + r")(?!\w)"
+        )
+        # Two-letter codes are only trusted in the location field and in
+        # upper case, otherwise "ON" matches every "on" in a description.
+        codes = "|".join(PROVINCES)
+        cities = "|".join(re.escape(city) for city in sorted(CITIES, key=len, reverse=True))
+        self.city_code_pattern = re.compile(r"(?i:\b(?:" + cities + r"))\s*,?\s*(" + codes + r")\b")
+        self.code_pattern = re.compile(r",\s*(" + codes + r")\b")
+        self.state_pattern = re.compile(r",\s*(?:" + "|".join(US_STATES) + r")\b")
+
+    def _scan(self, job, fields, named=()):
+        """Tags for the given fields.
+
+        A city name only implies Canada; an explicitly named other country
+        overrules that ("Surrey, UK", "Waterloo, Belgium").
+        """
+        text = "\n" + "\n".join(str(job.get(field) or "") for field in fields).lower()
+        named, implied = set(named), set()
+        for phrase in self.pattern.findall(text):
+            (implied if phrase in CITIES else named).update(self.phrases[phrase])
+        if _foreign(named) and "country:CA" not in named:
+            return named
+        return named | implied
+
+    def _code_tags(self, location):
+        found = set()
+        if self.state_pattern.search(location):
+            found.add("country:US")
+        for code in self.city_code_pattern.findall(location):
+            found.update({f"province:{code}", "country:CA"})
+        return found
+
+    def tags(self, job):
+        location = str(job.get("location") or "")
+        found = self._scan(job, self.primary_fields, self._code_tags(location))
+        # A bare ", ON" counts when nothing else in the field names a country.
+        if not _foreign(found):
+            for code in self.code_pattern.findall(location):
+                if code not in AMBIGUOUS_CODES:
+                    found.update({f"province:{code}", "country:CA"})
+        if not any(tag.startswith("country:") for tag in found):
+            # Remote/worldwide/region tags from the location still count.
+            found |= self._scan(job, self.fallback_fields)
+        return found
+
+
+def matches(tags, country=None, province=None, remote=None, allow_worldwide=False):
+    if country:
+        if f"country:{country}" not in tags and not (allow_worldwide and "worldwide" in tags):
+            return False
+    if province and f"province:{province}" not in tags:
+        return False
+    if remote is not None and ("remote" in tags) != remote:
+        return False
+    return True
+
+
+_shared_matcher = None
+
+
+def shared_matcher():
+    global _shared_matcher
+    if _shared_matcher is None:
+        _shared_matcher = LocationMatcher()
+    return _shared_matcher
+
+
+def filter_jobs(jobs, **criteria):
+    """Split jobs into (kept, discarded), tagging each with `location_tags`."""
+    matcher = shared_matcher()
+    kept, discarded = [], []
+    for job in jobs:
+        tags = matcher.tags(job)
+        job["location_tags"] = sorted(tags)
+        (kept if matches(tags, **criteria) else discarded).append(job)
+    return kept, discarded
+
+
+# === BENCHMARK ===
+# Places that must never be kept for country="CA".
+FOREIGN_PLACES = ("Austin, TX", "London, UK", "Berlin, Germany", "Amsterdam, NL", "Lima, PE",
+                  "Seoul, SK", "Waterloo, Belgium", "Surrey, UK", "Vancouver, WA")
+
+
+def _synthetic_jobs(count, seed=7):
+    rng = random.Random(seed)
+    places = ["Toronto, ON", "Remote - Canada", "Regina, SK", "Vancouver, BC", "Worldwide",
+              "Remote (US only)", "", "", "", ""] + list(FOREIGN_PLACES)
+    filler = ("We build data products and ship on a weekly cadence. Our team "
+              "values ownership, clear writing and pragmatic engineering. ") * 4
+    return [{
+        "title": rng.choice(["Data Scientist", "Backend Engineer", "Product Manager"]),
+        "company": f"Company {i}",
+        "url": f"https://example.com/jobs/{i}?utm_source=canada",
+        "location": rng.choice(places),
+        "description": f"<p>{filler}</p>",
+        "source": "synthetic",
+    } for i in range(count)]
+
+
+if __name__ == "__main__":
+    import json
+
+    jobs = _synthetic_jobs(100_000)
+
+    started = time.perf_counter()
+    legacy = sum("canada" in json.dumps(job).lower() for job in jobs)
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    kept, _ = filter_jobs(jobs, country="CA")
+    matcher_s = time.perf_counter() - started
+    wrong = sum(job["location"] in FOREIGN_PLACES for job in kept)
+
+    print(f"json.dumps substring: {legacy_s:.2f}s, {legacy} kept (URL noise included)")
+    print(f"gazetteer matcher:    {matcher_s:.2f}s, {len(kept)} kept, {wrong} outside Canada")
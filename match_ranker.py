@@ -0,0 +1,295 @@
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import time
+import zlib
+
+import numpy as np
+import scipy.sparse as sp
+
+from jsonl_io import iter_jobs
+from seen_index import content_hash, job_key
+
+# === RANKER SETTINGS ===
+N_FEATURES = 2 ** 18
+INDEX_PATH = "processed_jobs/match_index.npz"
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "our", "the", "to", "we", "with", "you", "your", "will", "not", "available",
+}
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+def job_text(job):
+    """Text used for matching: title twice, then skills, duties and requirements."""
+    skills = job.get("skills") or {}
+    quals = job.get("qualifications") or {}
+    parts = [job.get("title", "")] * 2
+    if isinstance(skills, dict):
+        parts += _as_list(skills.get("technical"))
+    if isinstance(quals, dict):
+        parts += _as_list(quals.get("required")) + _as_list(quals.get("preferred"))
+    parts += _as_list(job.get("responsibilities"))
+    parts.append(job.get("description", "") or "")
+    return "\n".join(p for p in parts if p)
+
+
+def index_key(job):
+    return job_key(job) if job.get("url") else content_hash(job_text(job))
+
+
+def _features(text):
+    tokens = [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts = {}
+    for gram in grams:
+        # crc32 is stable across processes, unlike hash(), so saved indexes stay valid.
+        column = zlib.crc32(gram.encode("utf-8")) % N_FEATURES
+        counts[column] = counts.get(column, 0) + 1
+    return counts
+
+
+def vectorize(texts):
+    """Hashed, sublinear term-frequency rows as a CSR matrix."""
+    indptr, indices, data = [0], [], []
+    for text in texts:
+        counts = _features(text)
+        indices.extend(counts.keys())
+        data.extend(1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts))))
+        indptr.append(len(indices))
+    return sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(texts), N_FEATURES),
+    )
+
+
+def _weigh(matrix, idf):
+    """matrix @ diag(idf) without building a 2**18 square diagonal."""
+    matrix = matrix.tocsr(copy=True)
+    matrix.data *= idf[matrix.indices]
+    return matrix
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.diags(1.0 / norms) @ matrix
+
+
+class MatchIndex:
+    """Incremental TF-IDF index of jobs scored against resumes with sparse matrix ops.
+
+    New rows are kept as blocks and only stacked into one matrix when the
+    whole index is needed, so adding jobs one small batch at a time stays
+    cheap. A job whose text changed gets a fresh row; the old one is
+    retired (its key set to None) and dropped on save().
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.hashes = []
+        self.positions = {}
+        self.df = np.zeros(N_FEATURES, dtype=np.int64)
+        self._tf = sp.csr_matrix((0, N_FEATURES), dtype=np.float32)
+        self._blocks = []
+        self._weighted = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def tf(self):
+        if self._blocks:
+            self._tf = sp.vstack([self._tf] + self._blocks, format="csr")
+            self._blocks = []
+        return self._tf
+
+    def _rows(self, positions):
+        """TF rows by position, read from the pending blocks without stacking them."""
+        rows, starts, start = [], [], self._tf.shape[0]
+        for block in self._blocks:
+            starts.append(start)
+            start += block.shape[0]
+        for position in positions:
+            if position < self._tf.shape[0]:
+                rows.append(self._tf[position])
+                continue
+            # Recent rows are the usual ask, so search from the newest block.
+            for block_start, block in zip(reversed(starts), reversed(self._blocks)):
+                if position >= block_start:
+                    rows.append(block[position - block_start])
+                    break
+        return sp.vstack(rows, format="csr") if rows else sp.csr_matrix((0, N_FEATURES), dtype=np.float32)
+
+    def add(self, jobs):
+        """Index new jobs and re-index changed ones; returns how many rows were written."""
+        new_keys, hashes, texts, stale = [], [], [], []
+        for job in jobs:
+            key = index_key(job)
+            text = job_text(job)
+            digest = content_hash(text)
+            position = self.positions.get(key)
+            if position is not None and (position >= len(self.keys) or self.hashes[position] == digest):
+                # Unchanged, or already added earlier in this call.
+                continue
+            if position is not None:
+                stale.append(position)
+                self.keys[position] = None
+            self.positions[key] = len(self.keys) + len(new_keys)
+            new_keys.append(key)
+            hashes.append(digest)
+            texts.append(text)
+        if not texts:
+            return 0
+        if stale:
+            # Retired rows stop counting toward document frequency.
+            np.subtract.at(self.df, self._rows(stale).indices, 1)
+        rows = vectorize(texts)
+        np.add.at(self.df, rows.indices, 1)
+        self._blocks.append(rows)
+        self.keys.extend(new_keys)
+        self.hashes.extend(hashes)
+        self._weighted = None
+        return len(new_keys)
+
+    def idf(self):
+        return (np.log((1.0 + len(self)) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+    def _weighted_jobs(self):
+        # Weighted, normalized rows are cached until the next add().
+        if self._weighted is None:
+            self._weighted = _normalize_rows(_weigh(self.tf, self.idf())).tocsr()
+        return self._weighted
+
+    def score(self, resume_texts):
+        """Cosine scores as a (rows x resumes) dense array; retired rows included."""
+        queries = _normalize_rows(_weigh(vectorize(resume_texts), self.idf()))
+        return (self._weighted_jobs() @ queries.T).toarray()
+
+    def score_jobs(self, jobs, resume_texts, idf=None):
+        """Add jobs and score only their rows, e.g. as they stream in.
+
+        Pass a fixed `idf` (e.g. taken once at startup) so a job's score does
+        not depend on how many others were added before it.
+        """
+        jobs = list(jobs)
+        self.add(jobs)
+        idf = self.idf() if idf is None else idf
+        weighted = _normalize_rows(_weigh(self._rows([self.positions[index_key(job)] for job in jobs]), idf))
+        queries = _normalize_rows(_weigh(vectorize(resume_texts), idf))
+        return (weighted @ queries.T).toarray()
+
+    def top(self, resume_text, k=None, threshold=None):
+        scores = self.score([resume_text])[:, 0]
+        order = [i for i in np.argsort(-scores) if self.keys[i] is not None]
+        if k is not None:
+            order = order[:k]
+        return [(self.keys[i], float(scores[i])) for i in order if threshold is None or scores[i] >= threshold]
+
+    def compact(self):
+        """Drop retired rows."""
+        live = [i for i, key in enumerate(self.keys) if key is not None]
+        if len(live) == len(self.keys):
+            return
+        self._tf = self.tf[live]
+        self.keys = [self.keys[i] for i in live]
+        self.hashes = [self.hashes[i] for i in live]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self._weighted = None
+
+    def save(self, path=INDEX_PATH):
+        self.compact()
+        tf = self.tf
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path, data=tf.data, indices=tf.indices, indptr=tf.indptr,
+            df=self.df, keys=np.array(json.dumps(self.keys)), hashes=np.array(json.dumps(self.hashes))
+        )
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        stored = np.load(path)
+        index.keys = json.loads(str(stored["keys"]))
+        # Indexes saved before hashes were kept re-vectorize each job once.
+        index.hashes = json.loads(str(stored["hashes"])) if "hashes" in stored else [""] * len(index.keys)
+        index.positions = {key: i for i, key in enumerate(index.keys)}
+        index._tf = sp.csr_matrix(
+            (stored["data"], stored["indices"], stored["indptr"]), shape=(len(index.keys), N_FEATURES)
+        )
+        index.df = stored["df"]
+        return index
+
+
+def rank_jobs(resume_text, jobs, top_k=None, threshold=None, path=INDEX_PATH):
+    """Return (job, score) pairs, best first, limited to top_k / threshold.
+
+    Jobs go through the saved index, so only new or changed postings are
+    vectorized and IDF reflects every job seen so far.
+    """
+    by_key = {}
+    for job in jobs:
+        by_key.setdefault(index_key(job), job)
+    index = MatchIndex.load(path)
+    index.add(by_key.values())
+    index.save(path)
+    if not by_key:
+        return []
+    scores = index.score_jobs(by_key.values(), [resume_text])[:, 0]
+    ranked = sorted(zip(by_key.values(), scores.tolist()), key=lambda pair: -pair[1])
+    if threshold is not None:
+        ranked = [(job, score) for job, score in ranked if score >= threshold]
+    return ranked[:top_k] if top_k is not None else ranked
+
+
+# === BENCHMARK ===
+def _synthetic_jobs(count, seed=3):
+    rng = random.Random(seed)
+    skills = ["python", "sql", "spark", "aws", "pytorch", "tensorflow", "react", "java", "kotlin",
+              "docker", "kubernetes", "tableau", "excel", "statistics", "forecasting", "nlp", "go"]
+    titles = ["Data Scientist", "ML Engineer", "Backend Engineer", "Data Analyst", "DevOps Engineer"]
+    return [{
+        "title": rng.choice(titles),
+        "url": f"https://example.com/jobs/{i}",
+        "skills": {"technical": rng.sample(skills, 5)},
+        "responsibilities": [f"Own {rng.choice(skills)} pipelines and ship {rng.choice(skills)} services"],
+    } for i in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build/update the job match index or benchmark it")
+    parser.add_argument("--benchmark", action="store_true", help="score 100k synthetic jobs against 5 resumes")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        index = MatchIndex()
+        started = time.perf_counter()
+        index.add(_synthetic_jobs(100_000))
+        build_s = time.perf_counter() - started
+        resumes = ["python sql statistics forecasting pytorch data scientist",
+                   "java kotlin backend engineer docker kubernetes",
+                   "react frontend developer", "excel tableau data analyst", "aws devops engineer go"]
+        index.score(resumes[:1])  # warm the weighted matrix cache
+        started = time.perf_counter()
+        scores = index.score(resumes)
+        score_s = time.perf_counter() - started
+        print(f"indexed {len(index)} jobs in {build_s:.1f}s; scored against {len(resumes)} resumes "
+              f"in {score_s * 1000:.0f} ms ({scores.shape})")
+    else:
+        index = MatchIndex.load()
+        added = 0
+        for path in sorted(glob.glob("processed_jobs/structured_jobs_*.json*")):
+            added += index.add(iter_jobs(path))
+        index.save()
+        print(f"💾 Match index: {len(index)} jobs ({added} new) → {INDEX_PATH}")
@@ -0,0 +1,173 @@
+import bisect
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# === METRICS SETTINGS ===
+REPORT_DIR = "results/metrics"
+# Seconds; the same bounds are used for every latency histogram.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+MAX_SAMPLES = 5000
+
+
+class Histogram:
+    """Bucket counts for Prometheus plus a reservoir sample for quantiles."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def quantile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "p99": round(self.quantile(0.99), 4),
+            "max": round(self.max, 4),
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.buckets)),
+        }
+
+
+def _series(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Process-wide counters and latency histograms keyed by name + labels."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def report(self):
+        with self._lock:
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(),
+                "elapsed_s": round(time.time() - self.started, 3),
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **hist.summary()}
+                    for (name, labels), hist in sorted(self.histograms.items())
+                ],
+            }
+
+    def prometheus(self):
+        lines, typed = [], set()
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], hist.buckets):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, run_name, report_dir=REPORT_DIR):
+        """Write <run_name>_<timestamp>.json and .prom; returns the JSON path."""
+        os.makedirs(report_dir, exist_ok=True)
+        base = os.path.join(report_dir, f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(base + ".prom", "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        return base + ".json"
+
+    def print_summary(self):
+        report = self.report()
+        print(f"\n⏱️  Where time went ({report['elapsed_s']:.1f}s wall):")
+        for hist in sorted(report["histograms"], key=lambda h: -h["sum"]):
+            labels = ",".join(f"{k}={v}" for k, v in hist["labels"].items())
+            name = f"{hist['name']}{'{' + labels + '}' if labels else ''}"
+            print(f"  {name:<48} {hist['count']:>6}x  total {hist['sum']:>8.2f}s  "
+                  f"p50 {hist['p50']:.3f}s  p95 {hist['p95']:.3f}s  max {hist['max']:.3f}s")
+        if report["counters"]:
+            print("📈 Counters:")
+            for counter in report["counters"]:
+                labels = ",".join(f"{k}={v}" for k, v in counter["labels"].items())
+                print(f"  {counter['name']}{'{' + labels + '}' if labels else ''}: {counter['value']:g}")
+
+
+metrics = Metrics()
+
+
+def finish_run(run_name):
+    """Print the summary and write the JSON + Prometheus reports."""
+    metrics.print_summary()
+    path = metrics.write_report(run_name)
+    print(f"📊 Metrics report → {path} (+ .prom)")
+    return path
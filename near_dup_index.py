@@ -0,0 +1,230 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from rule_extractor import LINK_RE
+from seen_index import canonical_url, content_hash, job_key
+
+# === INDEX SETTINGS ===
+INDEX_PATH = os.getenv("NEAR_DUP_INDEX_PATH", "results/near_dups.sqlite")
+ENABLED = os.getenv("NEAR_DUP_INDEX", "on").lower() not in ("0", "off", "false", "no")
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+ROWS = NUM_PERM // BANDS
+SIMILARITY = 0.8
+# Listing cards are a few words long: "Senior X" vs "X" must stay apart.
+SHORT_SIMILARITY = 0.9
+SHINGLE_WORDS = 20
+PRIME = 4294967291  # largest prime below 2**32, so a * x + b fits in uint64
+
+_rng = np.random.default_rng(20250415)
+PERM_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+PERM_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+
+LINK_URL_RE = re.compile(r"\]\([^)]*\)|https?://\S+")
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text):
+    # Drop URLs (they differ per source) and punctuation/markup.
+    text = LINK_URL_RE.sub(" ", (text or "").lower())
+    return NON_WORD_RE.sub(" ", text).strip()
+
+
+def job_fingerprint(job):
+    return normalize_text(f"{job.get('title', '')} {job.get('company', '')} {job.get('description', '')}")
+
+
+def shingles(text):
+    """Word 3-grams for descriptions, character 5-grams for short cards."""
+    words = text.split()
+    if len(words) >= SHINGLE_WORDS:
+        grams = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+    else:
+        grams = {text[i:i + 5] for i in range(max(0, len(text) - 4))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text):
+    values = shingles(normalize_text(text))
+    if not len(values):
+        return None
+    return ((PERM_A * values + PERM_B) % np.uint64(PRIME)).min(axis=1)
+
+
+def listing_key(chunk):
+    """Canonical URL of a listing card's job link, or the chunk's content hash.
+
+    Keying by URL lets an edited card replace its earlier version instead of
+    clustering with it as a near-duplicate.
+    """
+    link = LINK_RE.search(chunk)
+    return canonical_url(link.group(2)) if link else content_hash(chunk)
+
+
+def _buckets(signature):
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        yield band, int.from_bytes(digest, "big", signed=True)
+
+
+class NearDupIndex:
+    """Clusters near-identical postings across sources with MinHash + LSH.
+
+    Each key (canonical job URL or chunk hash) is assigned to a cluster whose
+    id is the key of the first posting seen with that content. When a key
+    comes back with different text, its signature is replaced. A
+    representative stays one; any other member is clustered again. Lookups
+    only compare against postings sharing an LSH band bucket, so cost does
+    not grow with the size of the corpus.
+    """
+
+    def __init__(self, path=INDEX_PATH, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    key TEXT PRIMARY KEY,
+                    cluster TEXT NOT NULL,
+                    source TEXT,
+                    url TEXT,
+                    signature BLOB NOT NULL,
+                    added REAL NOT NULL,
+                    digest TEXT
+                )
+            """)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(postings)")]
+            if "digest" not in columns:
+                # Indexes built before edits were tracked.
+                self._conn.execute("ALTER TABLE postings ADD COLUMN digest TEXT")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS bands (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    key TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, bucket)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (key)")
+            self._conn.commit()
+
+    def _closest(self, signature, buckets, threshold, exclude=None):
+        candidates = set()
+        for band, bucket in buckets:
+            rows = self._conn.execute("SELECT key FROM bands WHERE band = ? AND bucket = ?", (band, bucket))
+            candidates.update(key for key, in rows)
+        candidates.discard(exclude)
+        best, best_score = None, threshold
+        for key in candidates:
+            cluster, blob = self._conn.execute(
+                "SELECT cluster, signature FROM postings WHERE key = ?", (key,)
+            ).fetchone()
+            score = float(np.mean(np.frombuffer(blob, dtype=np.uint64) == signature))
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+
+    def cluster(self, key, text, source=None, url=None):
+        """Return the cluster id for this posting, adding or updating it in the index."""
+        if not self.enabled:
+            return key
+        digest = content_hash(normalize_text(text))
+        with self._lock:
+            row = self._conn.execute("SELECT cluster, digest FROM postings WHERE key = ?", (key,)).fetchone()
+            if row and row[1] is None:
+                # Rows from before digests were stored are taken as unchanged.
+                self._conn.execute("UPDATE postings SET digest = ? WHERE key = ?", (digest, key))
+                self._conn.commit()
+            if row and row[1] in (digest, None):
+                return row[0]
+            signature = minhash(text)
+            if signature is None:
+                return row[0] if row else key
+            buckets = list(_buckets(signature))
+            threshold = SIMILARITY if len(normalize_text(text).split()) >= SHINGLE_WORDS else SHORT_SIMILARITY
+            if row and row[0] == key:
+                # An edited representative keeps its cluster.
+                cluster = key
+            else:
+                cluster = self._closest(signature, buckets, threshold, exclude=key) or key
+            if row:
+                self._conn.execute("DELETE FROM bands WHERE key = ?", (key,))
+            self._conn.execute(
+                """INSERT INTO postings (key, cluster, source, url, signature, added, digest)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET
+                       cluster = excluded.cluster, signature = excluded.signature, digest = excluded.digest""",
+                (key, cluster, source, url, signature.tobytes(), time.time(), digest),
+            )
+            self._conn.executemany(
+                "INSERT INTO bands (band, bucket, key) VALUES (?, ?, ?)",
+                [(band, bucket, key) for band, bucket in buckets],
+            )
+            self._conn.commit()
+        return cluster
+
+    def is_representative(self, key, text, source=None, url=None):
+        return self.cluster(key, text, source, url) == key
+
+    def filter_representatives(self, jobs):
+        """Return one job per cluster, tagging each with its cluster_id."""
+        kept = []
+        for job in jobs:
+            key = job_key(job)
+            job["cluster_id"] = self.cluster(key, job_fingerprint(job), job.get("source"), job.get("url"))
+            if job["cluster_id"] == key:
+                kept.append(job)
+        return kept
+
+
+_shared_index = None
+
+
+def shared_near_dups():
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = NearDupIndex()
+    return _shared_index
+
+
+if __name__ == "__main__":
+    # Insert cost as the corpus grows: it should stay flat, not climb.
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(5000)]
+    index = NearDupIndex(":memory:")
+    originals, inserted, reposts, clustered, false_merges = [], 0, 0, 0, 0
+    for checkpoint in (2_000, 10_000, 30_000):
+        started = time.perf_counter()
+        batch = checkpoint - inserted
+        for i in range(batch):
+            if originals and rng.random() < 0.2:
+                # Re-post of an earlier listing with a few words changed.
+                words = rng.choice(originals)[1].split()
+                for _ in range(3):
+                    words[rng.randrange(len(words))] = rng.choice(vocab)
+                key, text = f"dup{inserted + i}", " ".join(words)
+                reposts += 1
+            else:
+                key, text = f"job{inserted + i}", " ".join(rng.choices(vocab, k=120))
+                originals.append((key, text))
+            merged = index.cluster(key, text) != key
+            clustered += merged and key.startswith("dup")
+            false_merges += merged and key.startswith("job")
+        elapsed = time.perf_counter() - started
+        inserted = checkpoint
+        print(f"{inserted:>6} postings: {elapsed / batch * 1000:.2f} ms per insert, "
+              f"{clustered}/{reposts} re-posts clustered, {false_merges} false merges")
@@ -0,0 +1,271 @@
+import asyncio
+import argparse
+import datetime
+import logging
+import os
+import time
+from agent_brain import MODEL, stream_cover_letter
+from browser_pool import BrowserPool
+from description_cleaner import clean_description_async
+from feed_fetcher import fetch_feed, load_state, save_state
+from http_client import HttpClient
+from jsonl_io import append_jsonl
+from location_matcher import filter_jobs
+from main import FEEDS, LOCATION_FILTER, parse_feed
+from match_ranker import MatchIndex
+from metrics import finish_run, metrics
+from near_dup_index import shared_near_dups
+from resume_profile import load_profile
+from rule_extractor import NOT_AVAILABLE
+from seen_index import job_content, job_key, shared_index
+from visual_job_extractor import extract_chunk
+
+# === PIPELINE SETTINGS ===
+QUEUE_SIZE = 16
+WORKERS = {"enrich": 4, "clean": 4, "extract": 4, "rank": 1, "letter": 4}
+# Jobs already waiting when the rank worker frees up are scored together.
+RANK_BATCH = 8
+MIN_SCORE = 0.1
+OUTPUT_DIR = "results"
+SEEN_STAGE = "pipeline"
+
+DONE = object()
+
+
+class Stage:
+    """A pool of workers moving items from one bounded queue to the next.
+
+    A handler returns the item to pass on, or None to drop it. With
+    batch > 1 it gets a list of the items already waiting (up to batch)
+    and returns a list of results. Bounded queues give backpressure: a
+    slow stage fills its inbox and the stage before it waits instead of
+    piling up work in memory.
+    """
+
+    def __init__(self, name, handler, workers=1, batch=1):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch = batch
+        self.counts = {"in": 0, "out": 0, "dropped": 0, "failed": 0}
+        self.busy_s = 0.0
+
+    def _count(self, result):
+        self.counts[result] += 1
+        metrics.inc("items_total", stage=self.name, result=result)
+
+    async def _take(self, inbox):
+        """The next items to handle, or None once the inbox is finished."""
+        item = await inbox.get()
+        items = []
+        while item is not DONE:
+            items.append(item)
+            if len(items) >= self.batch or inbox.empty():
+                return items
+            item = inbox.get_nowait()
+        # Hand the marker on so sibling workers stop too.
+        await inbox.put(DONE)
+        return items or None
+
+    async def _worker(self, inbox, outbox):
+        while True:
+            items = await self._take(inbox)
+            if items is None:
+                return
+            for _ in items:
+                self._count("in")
+            started = time.perf_counter()
+            try:
+                if self.batch > 1:
+                    results = await self.handler(items)
+                else:
+                    results = [await self.handler(items[0])]
+            except Exception as e:
+                item = items[0]
+                logging.error(f"❌ {self.name} failed on {item.get('url') or item.get('title')}: {e}")
+                for _ in items:
+                    self._count("failed")
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                self.busy_s += elapsed
+                metrics.observe("stage_item_seconds", elapsed / len(items), stage=self.name)
+            for result in results:
+                if result is None:
+                    self._count("dropped")
+                    continue
+                self._count("out")
+                if outbox is not None:
+                    # Time spent blocked here is backpressure from the next stage.
+                    blocked = time.perf_counter()
+                    await outbox.put(result)
+                    metrics.observe("stage_blocked_seconds", time.perf_counter() - blocked, stage=self.name)
+
+    async def run(self, inbox, outbox=None):
+        await asyncio.gather(*(self._worker(inbox, outbox) for _ in range(self.workers)))
+        if outbox is not None:
+            await outbox.put(DONE)
+
+
+class JobPipeline:
+    """fetch → enrich → clean → extract → rank → cover letter, all concurrent.
+
+    Jobs are marked seen only after the last stage handles them, so a run
+    that stops midway picks the unfinished ones up again next time.
+    """
+
+    def __init__(self, resume_text, workers=None, min_score=MIN_SCORE, model=MODEL, out_dir=OUTPUT_DIR):
+        self.resume_text = resume_text
+        self.workers = {**WORKERS, **(workers or {})}
+        self.min_score = min_score
+        self.model = model
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.jobs_path = os.path.join(out_dir, f"pipeline_jobs_{timestamp}.jsonl")
+        self.letters_path = os.path.join(out_dir, f"cover_letters_{timestamp}.jsonl")
+        self.index = shared_index()
+        self.near_dups = shared_near_dups()
+        # IDF comes from every job indexed so far and stays fixed for the
+        # run, so a job's score does not depend on what arrived before it.
+        self.ranker = MatchIndex.load()
+        self.idf = self.ranker.idf()
+        self.report = {}
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._profile = None
+        self.started = None
+        self.first_letter_s = None
+
+    def _done(self, job):
+        self.index.mark(SEEN_STAGE, job_key(job), job["_content"], url=job.get("url"))
+
+    # === STAGES ===
+    async def fetch(self, outbox):
+        state = load_state()
+
+        async def fetch_source(client, source, feed_config):
+            body = await fetch_feed(client, source, feed_config["url"], state.setdefault(source, {}))
+            raw_jobs = parse_feed(source, feed_config, body)
+            kept = raw_jobs if source == "jobicy" else filter_jobs(raw_jobs, **LOCATION_FILTER)[0]
+            fresh = [job for job in kept if self.index.is_new(SEEN_STAGE, job_key(job), job_content(job))]
+            unique = self.near_dups.filter_representatives(fresh)
+            self.report[source] = {"fetched": len(raw_jobs), "kept": len(kept), "new": len(fresh), "unique": len(unique)}
+            print(f"📥 {source}: {len(unique)} new jobs into the pipeline")
+            for job in unique:
+                job["_content"] = job_content(job)
+                await outbox.put(job)
+            for kind, count in self.report[source].items():
+                metrics.inc("items_total", count, stage="fetch", source=source, result=kind)
+
+        async with HttpClient() as client:
+            await asyncio.gather(*(fetch_source(client, source, config) for source, config in FEEDS.items()))
+        save_state(state)
+        await outbox.put(DONE)
+
+    async def enrich(self, job):
+        if job.get("description") or not job.get("url"):
+            return job
+        async with self._pool_lock:
+            # The browser only starts if some job actually needs a page load.
+            if self._pool is None:
+                self._pool = await BrowserPool(size=self.workers["enrich"]).__aenter__()
+        try:
+            job["description"] = (await self._pool.inner_text(job["url"])).strip()
+        except Exception as e:
+            print(f"❌ Failed to fetch {job['url']}: {e}")
+        return job
+
+    async def clean(self, job):
+        if job.get("description"):
+            job["description"], _ = await clean_description_async(job["description"])
+        return job
+
+    async def extract(self, job):
+        text = f"{job.get('title', '')}\n{job.get('company', '')}\n{job.get('location', '')}\n\n{job.get('description', '')}"
+        structured = await extract_chunk(text)
+        if structured:
+            # Structured fields fill in; the feed's own identity fields win.
+            for field, value in structured.items():
+                if value not in (None, NOT_AVAILABLE) and field not in ("title", "company", "url", "description", "source"):
+                    job[field] = value
+        return job
+
+    async def rank(self, jobs):
+        scores = self.ranker.score_jobs(jobs, [self.resume_text], idf=self.idf)[:, 0]
+        results = []
+        for job, score in zip(jobs, scores):
+            job["match_score"] = round(float(score), 4)
+            append_jsonl(self.jobs_path, {k: v for k, v in job.items() if k != "_content"})
+            if job["match_score"] < self.min_score:
+                self._done(job)
+                results.append(None)
+            else:
+                results.append(job)
+        return results
+
+    async def letter(self, job):
+        profile = await self._profile
+        result = await stream_cover_letter(profile, {k: v for k, v in job.items() if k != "_content"}, self.model)
+        if result is None:
+            # Counted as failed and left unseen, so the next run tries again.
+            raise RuntimeError("no cover letter after retries")
+        append_jsonl(self.letters_path, result)
+        self._done(job)
+        if self.first_letter_s is None:
+            self.first_letter_s = time.perf_counter() - self.started
+            metrics.observe("pipeline_first_letter_seconds", self.first_letter_s)
+            print(f"✉️  First cover letter after {self.first_letter_s:.1f}s")
+        print(f"✉️  {job.get('title')} ({job['match_score']:.2f}) in {result['latency_s']}s")
+        return job
+
+    async def run(self):
+        self.started = time.perf_counter()
+        self._profile = asyncio.ensure_future(asyncio.to_thread(load_profile, self.resume_text))
+        stages = [
+            Stage("enrich", self.enrich, self.workers["enrich"]),
+            Stage("clean", self.clean, self.workers["clean"]),
+            Stage("extract", self.extract, self.workers["extract"]),
+            Stage("rank", self.rank, self.workers["rank"], batch=RANK_BATCH),
+            Stage("letter", self.letter, self.workers["letter"]),
+        ]
+        queues = [asyncio.Queue(maxsize=QUEUE_SIZE) for _ in stages]
+        try:
+            await asyncio.gather(
+                self.fetch(queues[0]),
+                *(stage.run(queues[i], queues[i + 1] if i + 1 < len(queues) else None)
+                  for i, stage in enumerate(stages))
+            )
+        finally:
+            if self._pool is not None:
+                await self._pool.__aexit__(None, None, None)
+        # Saved (and compacted) once per run rather than per job.
+        self.ranker.save()
+        self.print_report(stages)
+        finish_run("pipeline")
+        return stages
+
+    def print_report(self, stages):
+        elapsed = time.perf_counter() - self.started
+        print("\n📊 Pipeline Report:")
+        for source, stats in self.report.items():
+            print(f"- {source}: {stats['fetched']} fetched → {stats['kept']} kept, {stats['new']} new, {stats['unique']} unique")
+        for stage in stages:
+            c = stage.counts
+            print(f"- {stage.name:<8} {c['in']} in → {c['out']} out, {c['dropped']} dropped, "
+                  f"{c['failed']} failed ({stage.workers} workers, {stage.busy_s:.1f}s busy)")
+        first = f"{self.first_letter_s:.1f}s" if self.first_letter_s is not None else "-"
+        print(f"\n💾 {stages[-1].counts['out']} cover letters → {self.letters_path} "
+              f"in {elapsed:.1f}s (first after {first})")
+
+
+if __name__ == "__main__":
+    from resume_loader import load_resume_text
+
+    parser = argparse.ArgumentParser(description="Run fetch → cover letter as one streaming pipeline")
+    parser.add_argument("resume", help="resume PDF")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE, help="match score needed for a cover letter")
+    parser.add_argument("--workers", action="append", default=[], metavar="STAGE=N",
+                        help=f"worker count per stage, e.g. letter=2 (defaults: {WORKERS})")
+    args = parser.parse_args()
+
+    workers = {stage: int(n) for stage, n in (spec.split("=", 1) for spec in args.workers)}
+    asyncio.run(JobPipeline(load_resume_text(args.resume), workers, args.min_score).run())
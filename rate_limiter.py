@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """A single refilling bucket.
+
+    The bucket holds at most `burst` units and refills at
+    `(per_minute - burst) / 60` units per second, so the total spent in any
+    60 second window never exceeds `per_minute` while a full quota can still
+    be used.
+    """
+
+    def __init__(self, per_minute, burst=None):
+        self.per_minute = per_minute
+        self.burst = burst if burst is not None else max(1, per_minute // 4)
+        self.burst = min(self.burst, per_minute)
+        self.rate = max(per_minute - self.burst, 1) / 60.0
+        self.level = float(self.burst)
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.burst, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # Requests bigger than the bucket are clamped so they can still run.
+        amount = min(amount, self.burst)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.burst)
+
+
+class RateLimiter:
+    """Shared requests/min + tokens/min limiter for async callers."""
+
+    def __init__(self, requests_per_minute=20, tokens_per_minute=None,
+                 request_burst=None, token_burst=None):
+        self.requests = TokenBucket(requests_per_minute, request_burst)
+        self.tokens = TokenBucket(tokens_per_minute, token_burst) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens=0):
+        # Waiting while holding the lock keeps callers served in FIFO order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.blocked_until > now:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.requests.refill()
+                wait = self.requests.wait_time(1)
+                if self.tokens:
+                    self.tokens.refill()
+                    wait = max(wait, self.tokens.wait_time(tokens))
+
+                if wait <= 0:
+                    self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return
+                await asyncio.sleep(wait)
+
+    def reconcile(self, estimated, actual):
+        """Correct the token bucket once the provider reports real usage."""
+        if self.tokens and actual is not None:
+            self.tokens.refill()
+            self.tokens.level += estimated - actual
+
+    def pause(self, seconds):
+        """Block every caller, e.g. after the provider answers 429."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
@@ -1,18 +1,155 @@
 import pdfplumber
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
-def load_resume_text(resume_path: str) -> str:
+CACHE_DIR = "cache/resumes"
+INDEX_PATH = os.path.join(CACHE_DIR, "index.json")
+# PDFs with at least this many pages are split across worker processes.
+PARALLEL_PAGES = 8
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_index():
+    if not os.path.exists(INDEX_PATH):
+        return {}
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+
+def _resume_hash(path, index):
+    # Reuse the stored hash while mtime and size are unchanged, so cache
+    # hits never re-read the PDF.
+    stat = os.stat(path)
+    entry = index.get(os.path.abspath(path))
+    if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+        return entry["sha256"]
+    digest = _file_hash(path)
+    index[os.path.abspath(path)] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest}
+    return digest
+
+
+def _page_layout(page):
+    lines = {}
+    for word in page.extract_words():
+        lines.setdefault(round(word["top"]), []).append(word)
+    return {
+        "page": page.page_number,
+        "width": float(page.width),
+        "height": float(page.height),
+        "text": page.extract_text() or "",  # image-only pages have no text layer
+        "lines": [
+            {"top": top, "x0": round(words[0]["x0"], 1), "text": " ".join(w["text"] for w in words)}
+            for top, words in sorted(lines.items())
+        ],
+    }
+
+
+def _extract_pages(path, page_numbers=None):
+    with pdfplumber.open(path) as pdf:
+        pages = pdf.pages if page_numbers is None else [pdf.pages[i] for i in page_numbers]
+        return [_page_layout(page) for page in pages]
+
+
+def _page_count(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_parallel(path, executor):
+    count = _page_count(path)
+    if count < PARALLEL_PAGES:
+        return _extract_pages(path)
+    chunks = [list(range(i, min(i + 2, count))) for i in range(0, count, 2)]
+    pages = []
+    for part in executor.map(_extract_pages, [path] * len(chunks), chunks):
+        pages.extend(part)
+    return pages
+
+
+def _build_entry(pages):
+    text = "\n".join(page["text"] for page in pages)
+    return {"text": text.replace('\u200b', '').strip(), "pages": pages}
+
+
+def _read_cache(digest):
+    cache_file = os.path.join(CACHE_DIR, f"{digest}.json")
+    if not os.path.exists(cache_file):
+        return None
+    with open(cache_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_cache(digest, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{digest}.json"), "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def load_resume(resume_path: str, executor=None) -> dict:
+    """Return {"text", "pages"} for a resume, parsing the PDF only on a cache miss."""
     if not os.path.exists(resume_path):
         raise FileNotFoundError(f"Resume file not found at: {resume_path}")
-    
-    text = ""
-    with pdfplumber.open(resume_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-
-    # Optional cleaning
-    text = text.replace('\u200b', '').strip()
-    return text
+
+    index = _load_index()
+    digest = _resume_hash(resume_path, index)
+    entry = _read_cache(digest)
+    if entry is None:
+        if executor is None:
+            pages = _extract_pages(resume_path)
+        else:
+            pages = _extract_parallel(resume_path, executor)
+        entry = _build_entry(pages)
+        _write_cache(digest, entry)
+    _save_index(index)
+    entry["sha256"] = digest
+    return entry
+
+
+def load_resume_text(resume_path: str) -> str:
+    return load_resume(resume_path)["text"]
+
+
+def load_resumes(paths, max_workers=None):
+    """Load many resumes; cache misses are parsed in a process pool."""
+    index = _load_index()
+    results, misses = {}, []
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Resume file not found at: {path}")
+        digest = _resume_hash(path, index)
+        entry = _read_cache(digest)
+        if entry is None:
+            misses.append((path, digest))
+        else:
+            entry["sha256"] = digest
+            results[path] = entry
+
+    if misses:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = executor.map(_extract_pages, [path for path, _ in misses])
+            for (path, digest), pages in zip(misses, parsed):
+                entry = _build_entry(pages)
+                _write_cache(digest, entry)
+                entry["sha256"] = digest
+                results[path] = entry
+
+    _save_index(index)
+    return results
 
 # For quick test
 if __name__ == "__main__":
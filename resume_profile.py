@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+from openai import OpenAI
+from dotenv import load_dotenv
+from llm_engine import BASE_URL, parse_json_content
+
+load_dotenv()
+
+client = OpenAI(
+    base_url=BASE_URL,
+    api_key=os.getenv("OPENAI_API_KEY"),
+)
+
+PROFILE_DIR = "cache/profiles"
+PROFILE_MODEL = "deepseek/deepseek-chat-v3-0324:free"
+
+PROFILE_PROMPT = """
+You are a career assistant AI.
+
+Condense the resume below into a compact JSON profile with this schema:
+{
+  "name": "Candidate name",
+  "headline": "One-line professional summary",
+  "skills": ["Most relevant technical and domain skills"],
+  "roles": [{"title": "Role", "company": "Company", "period": "Dates", "highlights": ["Key result"]}],
+  "achievements": ["Quantified accomplishments"],
+  "education": ["Degree, school, year"],
+  "contact": "Location, phone and email as one line"
+}
+Keep only facts from the resume. Return only valid JSON with no extra text.
+
+### RESUME:
+"""
+
+
+def resume_version(resume_text):
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()[:16]
+
+
+def build_profile(resume_text, model=PROFILE_MODEL):
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "user", "content": PROFILE_PROMPT + resume_text}
+            ]
+        )
+        return parse_json_content(response.choices[0].message.content)
+    except Exception as e:
+        print("❌ Failed to build resume profile:", e)
+        return None
+
+
+def load_profile(resume_text, model=PROFILE_MODEL):
+    """Return the compact profile for this resume, building it only once per version."""
+    version = resume_version(resume_text)
+    path = os.path.join(PROFILE_DIR, f"{version}.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    profile = build_profile(resume_text, model)
+    if profile is None:
+        # Fall back to the raw resume for this run; retry the summary next time.
+        return {"version": version, "resume": resume_text}
+
+    profile["version"] = version
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    print(f"🧾 Built resume profile {version}")
+    return profile
+
+
+def profile_block(profile):
+    # Deterministic serialization keeps the prompt prefix byte-identical
+    # across jobs, which is what provider prefix caching keys on.
+    return json.dumps(profile, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,195 @@
+import copy
+import os
+import re
+
+# === RULE SETTINGS ===
+# Above 1.0 no rule field is trusted and every card goes to the LLM
+# (benchmark.py does this to time the LLM path).
+CONFIDENCE_THRESHOLD = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.8"))
+# Score for a token a known card would print if it applied, but does not.
+NOT_STATED_SCORE = 0.8
+
+NOT_AVAILABLE = "Not Available"
+
+EMPTY_RECORD = {
+    "title": NOT_AVAILABLE,
+    "company": NOT_AVAILABLE,
+    "location": NOT_AVAILABLE,
+    "salary_range": {"min": None, "max": None, "currency": NOT_AVAILABLE},
+    "employment_type": NOT_AVAILABLE,
+    "work_arrangement": NOT_AVAILABLE,
+    "skills": {"technical": [NOT_AVAILABLE], "soft": [NOT_AVAILABLE]},
+    "experience": {"years": None, "level": NOT_AVAILABLE},
+    "responsibilities": [NOT_AVAILABLE],
+    "qualifications": {"required": [NOT_AVAILABLE], "preferred": [NOT_AVAILABLE]},
+}
+
+# Fields read off each layout's card by position or token.
+LAYOUT_FIELDS = {
+    "glassdoor": ("title", "company", "location", "salary_range"),
+    "wellfound": ("title", "company", "location", "salary_range", "employment_type", "work_arrangement"),
+    "indeed": ("title", "company", "location", "salary_range", "employment_type"),
+}
+# Cards also carry description snippets the rules cannot summarize; a record
+# is only final once these are filled too, by the rules or the LLM.
+CONTENT_FIELDS = ("skills", "experience", "responsibilities", "qualifications")
+
+COMPANY_RE = re.compile(r"^Company:\s*(.+)$", re.MULTILINE)
+LINK_RE = re.compile(r"\[([^\[\]]+)\]\((https?://[^)\s]+)\)")
+AMOUNT = r"\$\s?([\d,]+(?:\.\d+)?)\s?([kK])?"
+SALARY_RE = re.compile(AMOUNT + r"(?:\s?[-–]\s?" + AMOUNT + r")?\s?(per hour|an hour|a year|/yr|/hr)?", re.IGNORECASE)
+SKILLS_RE = re.compile(r"\*\*Skills:\*\*\s*([^\n]+)", re.IGNORECASE)
+EMPLOYMENT_RE = re.compile(r"\b(Full-time|Part-time|Contract|Internship|Temporary|Freelance)\b", re.IGNORECASE)
+ARRANGEMENT_RE = re.compile(r"\b(Remote|Hybrid|On-site|Onsite|In-person)\b", re.IGNORECASE)
+YEARS_RE = re.compile(r"(\d+)\+?\s?years? of exp", re.IGNORECASE)
+RATING_RE = re.compile(r"\s*\d\.\d$")
+SENIOR_RE = re.compile(r"\b(Senior|Sr\.?|Staff|Principal|Lead)\b", re.IGNORECASE)
+ENTRY_RE = re.compile(r"\b(Junior|Jr\.?|Intern|Entry[- ]level|New Grad)\b", re.IGNORECASE)
+
+
+def detect_layout(text):
+    for layout in LAYOUT_FIELDS:
+        if f"{layout}." in text:
+            return layout
+    return None
+
+
+def _amount(value, thousands):
+    number = float(value.replace(",", ""))
+    if thousands:
+        number *= 1000
+    return int(number) if number.is_integer() else number
+
+
+def _salary(text, layout):
+    match = SALARY_RE.search(text)
+    if not match:
+        return None
+    low = _amount(match.group(1), match.group(2))
+    high = _amount(match.group(3), match.group(4)) if match.group(3) else None
+    # Glassdoor.ca and ca.indeed quote CAD; Wellfound quotes USD.
+    currency = "USD" if layout == "wellfound" else "CAD"
+    return {"min": low, "max": high, "currency": currency}
+
+
+def _lines(text):
+    return [line.strip() for line in re.split(r"\n|<br>", text) if line.strip()]
+
+
+def _set(record, confidence, field, value, score):
+    record[field] = value
+    confidence[field] = score
+
+
+def rule_extract(text):
+    """Read what a listing card states plainly.
+
+    Returns (record, confidence) where record follows SYSTEM_PROMPT's
+    schema and confidence maps each filled field to a 0-1 score.
+    """
+    record = copy.deepcopy(EMPTY_RECORD)
+    confidence = {}
+    layout = detect_layout(text)
+
+    link = LINK_RE.search(text)
+    if link:
+        _set(record, confidence, "title", link.group(1).strip(), 0.95)
+        record["url"] = link.group(2)
+
+    salary = _salary(text, layout)
+    if salary:
+        _set(record, confidence, "salary_range", salary, 0.9)
+    elif "$" not in text:
+        # No amount anywhere on the card: "no salary" is itself certain.
+        confidence["salary_range"] = 0.9
+
+    skills = SKILLS_RE.search(text)
+    if skills:
+        technical = [s.strip() for s in skills.group(1).split(",") if s.strip()]
+        record["skills"]["technical"] = technical
+        confidence["skills"] = 0.9
+
+    employment = EMPLOYMENT_RE.search(text)
+    if employment:
+        _set(record, confidence, "employment_type", employment.group(1).capitalize(), 0.9)
+    elif layout:
+        # Known cards always print these tokens when they apply, so their
+        # absence means the listing does not say; an LLM could not do better.
+        confidence["employment_type"] = NOT_STATED_SCORE
+
+    arrangement = ARRANGEMENT_RE.search(text)
+    if arrangement:
+        value = arrangement.group(1).capitalize()
+        value = "On-site" if value in ("Onsite", "In-person") else value
+        _set(record, confidence, "work_arrangement", value, 0.85)
+    elif layout:
+        confidence["work_arrangement"] = NOT_STATED_SCORE
+
+    years = YEARS_RE.search(text)
+    if years:
+        record["experience"]["years"] = int(years.group(1))
+        confidence["experience"] = 0.9
+    if SENIOR_RE.search(record["title"]):
+        record["experience"]["level"] = "Senior"
+        confidence["experience"] = max(confidence.get("experience", 0), 0.7)
+    elif ENTRY_RE.search(record["title"]):
+        record["experience"]["level"] = "Entry"
+        confidence["experience"] = max(confidence.get("experience", 0), 0.7)
+
+    lines = _lines(text)
+    if layout == "glassdoor" and link:
+        # Company name, rating, title link, then location.
+        title_at = next((i for i, line in enumerate(lines) if link.group(0) in line), None)
+        if title_at:
+            _set(record, confidence, "company", lines[0], 0.85)
+        if title_at is not None and title_at + 1 < len(lines):
+            _set(record, confidence, "location", lines[title_at + 1], 0.85)
+    elif layout == "indeed" and len(lines) >= 3:
+        # Title, optional "New" badge, company + rating, location.
+        rest = [line for line in lines[1:] if line != "New"]
+        # With only badges after the title, company and location stay
+        # unscored and go to the LLM.
+        if rest:
+            _set(record, confidence, "company", RATING_RE.sub("", rest[0]), 0.85)
+        if len(rest) > 1:
+            location = re.sub(r"^(Hybrid work|Remote|On-site) in\s+", "", rest[1])
+            _set(record, confidence, "location", location, 0.85)
+    elif layout == "wellfound":
+        # The segmenter appends the section's company name.
+        company = COMPANY_RE.search(text)
+        if company:
+            _set(record, confidence, "company", company.group(1).strip(), 0.9)
+        # Title line, then salary, location and age lines in that order.
+        skip = ("$", "exp", " ago", "yesterday", "today", "company:")
+        place = next((line for line in lines[1:] if not any(s in line.lower() for s in skip)), None)
+        if place:
+            parts = [part.strip() for part in place.split("•")]
+            cities = [part for part in parts if part.lower() not in ("remote", "hybrid", "on-site")]
+            _set(record, confidence, "location", ", ".join(cities + [p for p in parts if p not in cities]), 0.85)
+
+    return record, confidence
+
+
+def missing_fields(text, confidence, threshold=CONFIDENCE_THRESHOLD):
+    layout = detect_layout(text)
+    if layout is None:
+        return list(EMPTY_RECORD)
+    return [field for field in LAYOUT_FIELDS[layout] + CONTENT_FIELDS if confidence.get(field, 0) < threshold]
+
+
+def llm_prompt(text, missing):
+    """Ask only for the fields the rules left open."""
+    if len(missing) == len(EMPTY_RECORD):
+        return f"Extract job information from this listing:\n\n{text}"
+    return (f"Extract only these fields from this listing: {', '.join(missing)}. "
+            f"Return a JSON object with just those keys, following the schema.\n\n{text}")
+
+
+def merge(rule_record, confidence, llm_record, threshold=CONFIDENCE_THRESHOLD):
+    """Keep confident rule fields and take everything else from the LLM."""
+    merged = copy.deepcopy(rule_record)
+    for field, value in llm_record.items():
+        # The card's own link beats any URL the model writes back.
+        if confidence.get(field, 0) < threshold and not (field == "url" and "url" in rule_record):
+            merged[field] = value
+    return merged
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# === INDEX SETTINGS ===
+INDEX_PATH = os.getenv("SEEN_INDEX_PATH", "results/seen_jobs.sqlite")
+ENABLED = os.getenv("SEEN_INDEX", "on").lower() not in ("0", "off", "false", "no")
+
+TRACKING_PARAMS = {"ref", "source", "src", "from", "trk", "refid", "gclid", "fbclid"}
+
+
+def content_hash(text):
+    # Whitespace-insensitive so re-rendered but identical postings match.
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def canonical_url(url):
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def job_key(job):
+    url = canonical_url(job.get("url", ""))
+    return url or content_hash(f"{job.get('title', '')}|{job.get('company', '')}")
+
+
+def job_content(job):
+    return f"{job.get('title', '')}|{job.get('company', '')}|{job.get('description', '')}"
+
+
+class SeenIndex:
+    """On-disk record of which postings each pipeline stage already handled.
+
+    Entries are keyed by (stage, key), where key is a canonical job URL or a
+    stable content hash, and remember the hash of the content processed so a
+    changed posting is treated as new again.
+    """
+
+    def __init__(self, path=INDEX_PATH, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen (
+                    stage TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    url TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (stage, key)
+                )
+            """)
+            self._conn.commit()
+
+    def is_new(self, stage, key, content):
+        if not self.enabled:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM seen WHERE stage = ? AND key = ?", (stage, key)
+            ).fetchone()
+        return row is None or row[0] != content_hash(content)
+
+    def mark(self, stage, key, content, url=None):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO seen (stage, key, content_hash, url, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (stage, key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    url = excluded.url,
+                    last_seen = excluded.last_seen
+            """, (stage, key, content_hash(content), url, now, now))
+            self._conn.commit()
+
+    def new_jobs(self, stage, jobs):
+        """Return jobs that are new or changed for `stage`, without marking them.
+
+        Call mark_jobs once their output is safely written, so a run that
+        fails in between hands them on again next time.
+        """
+        return [job for job in jobs if self.is_new(stage, job_key(job), job_content(job))]
+
+    def mark_jobs(self, stage, jobs):
+        for job in jobs:
+            self.mark(stage, job_key(job), job_content(job), url=job.get("url"))
+
+    def filter_new_jobs(self, stage, jobs):
+        """Return jobs that are new or changed for `stage` and mark them seen."""
+        fresh = self.new_jobs(stage, jobs)
+        self.mark_jobs(stage, fresh)
+        return fresh
+
+
+_shared_index = None
+
+
+def shared_index():
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = SeenIndex()
+    return _shared_index
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from llm_cache import LLMCache
+
+# === CACHE SETTINGS ===
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 1024
+
+
+class TieredCache:
+    """In-process LRU in front of an LLMCache store, with per-entry TTLs.
+
+    Values are JSON-serializable objects. The memory tier holds the most
+    recently used entries; the disk tier is the same SQLite store the LLM
+    responses use, capped at `max_bytes` with expired-first/LRU eviction.
+    Expired entries are treated as misses and removed when touched or by
+    `purge_expired`.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, memory_items=DEFAULT_MEMORY_ITEMS):
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self.store = LLMCache(path, max_bytes=max_bytes, enabled=True, ttl=ttl)
+        self._memory = OrderedDict()
+        self._memory_hits = 0
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        entry = self.store.lookup(key)
+        if entry is None:
+            return None
+        value = json.loads(entry[0])
+        with self._lock:
+            self._remember(key, value, entry[1] if entry[1] is not None else float("inf"))
+        return value
+
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        self.store.put(key, json.dumps(value, ensure_ascii=False), ttl=ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        self.store.delete(key)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            self._memory = OrderedDict((k, v) for k, v in self._memory.items() if v[1] > now)
+        return self.store.purge_expired()
+
+    def stats(self):
+        store = self.store.stats()
+        lookups = self._memory_hits + store["hits"] + store["misses"]
+        return {
+            "memory_hits": self._memory_hits,
+            "disk_hits": store["hits"],
+            "misses": store["misses"],
+            "expired": store["expired"],
+            "evicted": store["evicted"],
+            "entries": store["entries"],
+            "bytes": store["bytes"],
+            "memory_entries": len(self._memory),
+            "hit_rate": round((self._memory_hits + store["hits"]) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,11 +1,22 @@
-import json
 import os
-import time
 import datetime
-import re
+import asyncio
+import argparse
 from dotenv import load_dotenv
 import openai
 import logging
+from llm_engine import BASE_URL, LLMEngine, run_bounded
+from batch_extractor import BATCH_INSTRUCTIONS, BATCH_TOKEN_BUDGET, extract_batch, iter_batches
+from rule_extractor import llm_prompt, merge, missing_fields, rule_extract
+from crawl_reader import iter_crawl_pages
+from listing_segmenter import split_glassdoor, split_indeed, split_wellfound
+from jsonl_io import Checkpoint, append_jsonl, iter_jsonl, latest_file
+from llm_cache import shared_cache
+from seen_index import content_hash, shared_index
+from near_dup_index import listing_key, shared_near_dups
+from metrics import finish_run, metrics
+from job_store import shared_store
+from job_index import shared_job_index
 
 # Setup logging
 logging.basicConfig(
@@ -23,9 +34,9 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found.")
 
-client = openai.OpenAI(
+client = openai.AsyncOpenAI(
     api_key=api_key,
-    base_url="https://openrouter.ai/api/v1",
+    base_url=BASE_URL,
     default_headers={
         "HTTP-Referer": "http://localhost:5000",
         "X-Title": "Job Parser"
@@ -64,153 +75,188 @@ Always return valid JSON with this schema. Fill missing values with \"Not Availa
 Return only valid JSON with no extra text.
 """
 
-def call_llm(prompt, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            content = response.choices[0].message.content.strip()
-            if "```" in content:
-                content = re.search(r'```(?:json)?(.*?)```', content, re.DOTALL)
-                if content:
-                    content = content.group(1).strip()
-            return json.loads(content)
-        except Exception as e:
-            logging.warning(f"Attempt {attempt+1}/{max_retries}: Error: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    logging.error("Failed to process job after multiple attempts")
-    return None
+engine = LLMEngine(client, MODEL, SYSTEM_PROMPT)
+batch_engine = LLMEngine(client, MODEL, SYSTEM_PROMPT + BATCH_INSTRUCTIONS)
+
+async def call_llm(prompt):
+    return await engine.complete_json(prompt)
 
 def extract_glassdoor_jobs(markdown):
     logging.info("🔍 Extracting jobs from Glassdoor")
-    job_sections = re.split(r'-\s*!\[.*?Logo\]\(.*?\)', markdown)
-    job_chunks = []
-    for section in job_sections:
-        if len(section.strip()) < 100:
-            continue
-        has_job_link = re.search(r'\[.*?\]\(https://www\.glassdoor\.ca/job-listing/.*?\)', section)
-        has_salary_or_skills = (
-            "per hour" in section.lower() or
-            "glassdoor est." in section.lower() or
-            "**skills:**" in section.lower()
-        )
-        if has_job_link and has_salary_or_skills:
-            job_chunks.append(section.strip())
+    job_chunks = split_glassdoor(markdown)
     logging.info(f"✅ Extracted {len(job_chunks)} Glassdoor job chunks")
     return job_chunks
 
 def extract_wellfound_jobs(markdown):
     logging.info("🔍 Extracting jobs from Wellfound")
-    job_sections = markdown.split('[![')
-    job_chunks = []
-
-    for section in job_sections[1:]:
-        job_title_matches = re.findall(r'\[(.*?)\]\(https://wellfound\.com/jobs/\d+-', section)
-        if job_title_matches:
-            for title in job_title_matches:
-                title_pattern = re.escape(f"[{title}]")
-                job_content = re.search(rf'{title_pattern}.*?(?=\[|Save|Apply|$)', section, re.DOTALL)
-                if job_content:
-                    job_chunks.append(f"[{title}]{job_content.group(0)}")
-        else:
-            if any(keyword in section for keyword in ["Remote", "salary", "Full-time"]):
-                job_chunks.append(section)
-
+    job_chunks = split_wellfound(markdown)
     logging.info(f"✅ Extracted {len(job_chunks)} Wellfound job chunks")
     return job_chunks
 
 def extract_indeed_jobs(markdown):
     logging.info("🔍 Extracting jobs from Indeed")
-    job_chunks = []
-    table_rows = re.findall(r'\|\s*##\s*\[(.*?)\](.*?)\|\s*\|', markdown, re.DOTALL)
-    if table_rows:
-        logging.info(f"📄 Found {len(table_rows)} table-style listings")
-        for title, content in table_rows:
-            job_text = f"## [{title}]{content}"
-            job_chunks.append(job_text)
+    job_chunks = split_indeed(markdown)
     logging.info(f"✅ Extracted {len(job_chunks)} Indeed job chunks")
     return job_chunks
 
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
+async def extract_chunk(chunk):
+    # Deterministic fast path first; the LLM only fills what the rules
+    # could not read confidently.
+    with metrics.timer("extract_rules_seconds"):
+        record, confidence = rule_extract(chunk)
+    missing = missing_fields(chunk, confidence)
+    if not missing:
+        metrics.inc("extract_items_total", path="rules")
+        return record
+    metrics.inc("extract_items_total", path="llm")
+    structured = await call_llm(llm_prompt(chunk, missing))
+    return merge(record, confidence, structured) if structured else None
+
+def attach_source(structured, chunk, website_key, metadata):
+    structured["source"] = {
+        "website": website_key,
+        "original_url": metadata.get("url", ""),
+        "extraction_date": datetime.datetime.now().isoformat()
+    }
+    shared_index().mark("extract", content_hash(chunk), chunk, url=metadata.get("url"))
+
+async def process_chunk(chunk, website_key, metadata):
+    structured = await extract_chunk(chunk)
+    if structured:
+        attach_source(structured, chunk, website_key, metadata)
+    return structured
+
+async def process_batch(items):
+    results = []
+    pending = []
+    for index, (_, chunk, _) in enumerate(items):
+        record, confidence = rule_extract(chunk)
+        results.append(record if not missing_fields(chunk, confidence) else None)
+        if results[-1] is None:
+            pending.append((index, record, confidence))
+
+    # The rest share one request (and one copy of SYSTEM_PROMPT).
+    texts = [items[index][1] for index, _, _ in pending]
+    extracted = await extract_batch(batch_engine, extract_chunk, texts)
+    for (index, record, confidence), structured in zip(pending, extracted):
+        results[index] = merge(record, confidence, structured) if structured else None
+
+    for (key, chunk, metadata), structured in zip(items, results):
+        if structured:
+            attach_source(structured, chunk, key[0], metadata)
+    return results
+
+def pick_extractor(website_key):
+    if "glassdoor" in website_key.lower():
+        return extract_glassdoor_jobs
+    if "wellfound" in website_key.lower():
+        return extract_wellfound_jobs
+    if "indeed" in website_key.lower():
+        return extract_indeed_jobs
+    return None
 
-    extracted_jobs = []
-    request_count = 0
-    start_time = time.time()
+def iter_chunks(pages, checkpoint):
     processed_hashes = set()
+    page_counts = {}
+    index = shared_index()
+    near_dups = shared_near_dups()
 
-    for website_key, website_data in raw_data.items():
-        if website_data.get("status") != "completed":
-            logging.info(f"Skipping incomplete data for {website_key}")
+    for website_key, status, metadata, markdown in pages:
+        page_index = page_counts.get(website_key, 0)
+        page_counts[website_key] = page_index + 1
+
+        if status != "completed":
+            if page_index == 0:
+                logging.info(f"Skipping incomplete data for {website_key}")
+            continue
+
+        extractor = pick_extractor(website_key)
+        if extractor is None:
             continue
 
-        if "glassdoor" in website_key.lower():
-            extractor = extract_glassdoor_jobs
-        elif "wellfound" in website_key.lower():
-            extractor = extract_wellfound_jobs
-        elif "indeed" in website_key.lower():
-            extractor = extract_indeed_jobs
-        else:
+        if not markdown:
+            logging.warning(f"No markdown in {website_key}, page {page_index+1}")
             continue
 
-        for page_index, page_data in enumerate(website_data.get("data", [])):
-            markdown = page_data.get("markdown", "")
-            metadata = page_data.get("metadata", {})
+        job_chunks = extractor(markdown)
 
-            if not markdown:
-                logging.warning(f"No markdown in {website_key}, page {page_index+1}")
+        for chunk_index, chunk in enumerate(job_chunks):
+            key = (website_key, page_index, chunk_index)
+            if len(chunk) < 100 or checkpoint.done(key):
+                continue
+            chunk_hash = content_hash(chunk)
+            if chunk_hash in processed_hashes:
+                continue
+            processed_hashes.add(chunk_hash)
+            # Chunks extracted on an earlier run are skipped entirely.
+            if not index.is_new("extract", chunk_hash, chunk):
+                continue
+            # The same posting seen on another board is extracted once; keyed
+            # by the card's link so an edited posting replaces its old text.
+            if not near_dups.is_representative(listing_key(chunk), chunk, source=website_key):
                 continue
+            yield key, chunk, metadata
+
+async def main(resume=False, batch_tokens=0):
+    out_path = latest_file(os.path.join(OUTPUT_DIR, "structured_jobs_*.jsonl")) if resume else None
+    if out_path is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = os.path.join(OUTPUT_DIR, f"structured_jobs_{timestamp}.jsonl")
+        resume = False
+    checkpoint = Checkpoint(out_path.replace(".jsonl", ".checkpoint"), resume=resume)
+    if resume:
+        logging.info(f"⏩ Resuming {out_path}: {len(checkpoint)} chunks already done")
+
+    saved = 0
+
+    def save(key, structured):
+        nonlocal saved
+        # Each result hits disk as soon as it completes; the checkpoint is
+        # written after it so a crash can never skip a job.
+        append_jsonl(out_path, structured)
+        checkpoint.mark(key)
+        saved += 1
+        metrics.inc("items_total", stage="extract", result="saved")
+
+    async def handle(item):
+        key, chunk, metadata = item
+        with metrics.timer("extract_item_seconds"):
+            structured = await process_chunk(chunk, key[0], metadata)
+        if structured:
+            save(key, structured)
+
+    async def handle_batch(items):
+        with metrics.timer("extract_batch_seconds"):
+            results = await process_batch(items)
+        for (key, _, _), structured in zip(items, results):
+            if structured:
+                save(key, structured)
+
+    # The engine bounds in-flight requests and the shared limiter paces them
+    # against the provider quota.
+    chunks = iter_chunks(iter_crawl_pages(INPUT_FILE), checkpoint)
+    if batch_tokens:
+        batches = iter_batches(chunks, token_budget=batch_tokens, text=lambda item: item[1])
+        await run_bounded(batches, handle_batch)
+    else:
+        await run_bounded(chunks, handle)
 
-            job_chunks = extractor(markdown)
-
-            for chunk_index, chunk in enumerate(job_chunks):
-                if len(chunk) < 100:
-                    continue
-                chunk_hash = hash(chunk)
-                if chunk_hash in processed_hashes:
-                    continue
-                processed_hashes.add(chunk_hash)
-
-                current_time = time.time()
-                if current_time - start_time >= 60:
-                    request_count = 0
-                    start_time = current_time
-
-                if request_count >= 20:
-                    sleep_time = 60 - (current_time - start_time) + 2
-                    if sleep_time > 0:
-                        logging.info(f"Rate limit hit. Sleeping {sleep_time:.2f}s")
-                        time.sleep(sleep_time)
-                        request_count = 0
-                        start_time = time.time()
-
-                prompt = f"Extract job information from this listing:\n\n{chunk}"
-                structured = call_llm(prompt)
-                request_count += 1
-
-                if structured:
-                    structured["source"] = {
-                        "website": website_key,
-                        "original_url": metadata.get("url", ""),
-                        "extraction_date": datetime.datetime.now().isoformat()
-                    }
-                    extracted_jobs.append(structured)
-
-                time.sleep(0.5)
-
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = os.path.join(OUTPUT_DIR, f"structured_jobs_{timestamp}.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(extracted_jobs, f, indent=2)
-
-    logging.info(f"🟢 Saved {len(extracted_jobs)} jobs to {out_path}")
+    stats = shared_cache().stats()
+    logging.info(f"📦 LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+    logging.info(f"🟢 Saved {saved} jobs to {out_path}")
+    if saved:
+        # The whole file goes in, so a resumed run's earlier jobs are stored
+        # too; compaction drops any repeats.
+        stored = shared_store().append(iter_jsonl(out_path))
+        logging.info(f"🗄️  Appended {stored} jobs to the job store")
+        indexed = shared_job_index().upsert(iter_jsonl(out_path))
+        logging.info(f"🔎 {indexed} jobs added or updated in the search index")
+    finish_run("extract")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract structured jobs from a Firecrawl dump")
+    parser.add_argument("--resume", action="store_true", help="continue the latest run, skipping completed chunks")
+    parser.add_argument("--batch-tokens", type=int, default=0,
+                        help=f"pack several listings per request up to this many prompt tokens (e.g. {BATCH_TOKEN_BUDGET})")
+    args = parser.parse_args()
+    asyncio.run(main(resume=args.resume, batch_tokens=args.batch_tokens))